@@ -1,7 +1,11 @@
 """Core module of the plugin"""
-import bpy
+try:
+    import bpy
 
-from animationCombiner import registry
+    from animationCombiner import registry
+except ModuleNotFoundError:
+    # Worker processes only use animationCombiner.core, which does not need Blender
+    bpy = registry = None
 
 bl_info = {
     "name": "Animation Combiner",
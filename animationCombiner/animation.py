@@ -1,61 +1,133 @@
 """Animation processing module"""
-from mathutils import Quaternion
+from typing import List, Tuple
+
+import bpy
+import numpy as np
+
 from .api.actions import Action
+from .core import composition
+
+
+class Keyframes:
+    """Keyframes collected as arrays for every fcurve, which are then written into an Action all at once"""
+
+    def __init__(self) -> None:
+        self.channels = {}
+
+    @classmethod
+    def read(cls, obj) -> "Keyframes":
+        """Reads all keyframes which are already in the Action of the object"""
+        keyframes = cls()
+        animation_data = obj.animation_data
+        if animation_data is None or animation_data.action is None:
+            return keyframes
+        for fcurve in animation_data.action.fcurves:
+            co = np.empty(len(fcurve.keyframe_points) * 2, dtype=np.float32)
+            fcurve.keyframe_points.foreach_get("co", co)
+            group = fcurve.group.name if fcurve.group is not None else ""
+            keyframes.append(fcurve.data_path, fcurve.array_index, group, co[0::2], co[1::2])
+        return keyframes
+
+    def insert(self, data_path: str, group: str, frames, values) -> None:
+        """Inserts keyframes for every index of the property, values need to have (frames, indices) shape"""
+        frames = np.asarray(frames, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape((len(frames), -1))
+        for index in range(values.shape[1]):
+            self.append(data_path, index, group, frames, values[:, index])
+
+    def append(self, data_path: str, index: int, group: str, frames, values) -> None:
+        """Inserts keyframes for a single index of the property"""
+        _, all_frames, all_values = self.channels.setdefault((data_path, index), (group, [], []))
+        all_frames.append(np.asarray(frames, dtype=np.float64))
+        all_values.append(np.asarray(values, dtype=np.float64))
+
+    def relocate(self, ranges, offsets, value_offsets=None) -> "Keyframes":
+        """
+        Returns only keyframes which are inside of the ranges, each moved by the frame offset of its range.
+        :param ranges: (start, end) frames of ranges that do not overlap, end is exclusive
+        :param offsets: number of frames by which is every range moved
+        :param value_offsets: data path -> (ranges, indices) array, which is added to values in every range
+        """
+        result = Keyframes()
+        ranges = np.array(ranges, dtype=np.float64).reshape((-1, 2))
+        offsets = np.asarray(offsets, dtype=np.float64)
+        order = np.argsort(ranges[:, 0], kind="stable")
+        starts, ends = ranges[order, 0], ranges[order, 1]
+        value_offsets = value_offsets or {}
+        if len(starts) == 0:
+            return result
+
+        for (data_path, index), (group, _, _) in self.channels.items():
+            frames, values = self.merged(data_path, index)
+            position = np.searchsorted(starts, frames, side="right") - 1
+            inside = (position >= 0) & (frames < ends[np.maximum(position, 0)])
+            if not np.any(inside):
+                continue
+            ranges_index = order[position[inside]]
+            values = values[inside]
+            if data_path in value_offsets:
+                values = values + np.asarray(value_offsets[data_path], dtype=np.float64)[ranges_index, index]
+            result.append(data_path, index, group, frames[inside] + offsets[ranges_index], values)
+        return result
 
+    def update(self, other: "Keyframes") -> None:
+        """Adds all keyframes from the other instance, they replace keyframes on the same frame"""
+        for (data_path, index), (group, frames, values) in other.channels.items():
+            for frame, value in zip(frames, values):
+                self.append(data_path, index, group, frame, value)
 
-def process_animation(armature, action: Action, base_skeleton, skeleton, parts, frame_start=0):
-    """Test"""
-    frame_delay = action.length_group.slowdown
+    def merged(self, data_path: str, index: int):
+        """Sorted frames and their values of single channel, later keyframes replace earlier ones on the same frame"""
+        _, frames, values = self.channels[(data_path, index)]
+        # Same as with keyframe_insert
+        frames, last = np.unique(np.concatenate(frames)[::-1], return_index=True)
+        return frames, np.concatenate(values)[::-1][last]
+
+    def write(self, obj) -> None:
+        """
+        Replaces all keyframes in the Action of the object with these keyframes, creates the Action if needed.
+        Keyframes which should be kept need to be read and added first, see relocate.
+        """
+        animation_data = obj.animation_data or obj.animation_data_create()
+        if animation_data.action is None:
+            animation_data.action = bpy.data.actions.new(f"{obj.name}Action")
+        fcurves = animation_data.action.fcurves
+        for fcurve in list(fcurves):
+            fcurves.remove(fcurve)
+
+        for (data_path, index), (group, _, _) in self.channels.items():
+            frames, values = self.merged(data_path, index)
+            if group:
+                fcurve = fcurves.new(data_path, index=index, action_group=group)
+            else:
+                fcurve = fcurves.new(data_path, index=index)
+
+            fcurve.keyframe_points.add(len(frames))
+            fcurve.keyframe_points.foreach_set("co", np.column_stack((frames, values)).astype(np.float32).ravel())
+            fcurve.update()
+
+
+def composition_action(action: Action, base_skeleton, skeleton) -> Tuple[composition.Action, List[str]]:
+    """Translates the Action into the composition with all its arrays, returns it with names of bones it animates"""
     animation = action.animation
     order = animation.order
-    disabled_parts = {part.uuid for part in action.body_parts if not part.checked}
-
-    disabled_bones = {"root"}
-    for uuid, bones in parts.items():
-        if uuid in disabled_parts:
-            disabled_bones.update(bones)
-
-    # Set it to base rotation
-    for name, rotation in base_skeleton.items():
-        if name not in disabled_bones:
-            bone = armature.pose.bones[name]
-            bone.rotation_mode = "QUATERNION"
-            bone.rotation_quaternion = rotation
-            bone.keyframe_insert(
-                data_path="rotation_quaternion",
-                frame=frame_start,
-                group=name,
-            )
-
-    last_frame = frame_start
-    for i, frame in enumerate(animation.animation[action.length_group.start : action.length_group.end]):
-        last_frame = frame_start + (i * frame_delay)
-        for name, rotation in zip(order, frame.rotations):
-            if action.use_movement and name == "root":
-                armature.location += animation.movement[i].translation - animation.movement[max(0, i - 1)].translation
-                armature.keyframe_insert(
-                    data_path="location",
-                    frame=last_frame,
-                    group=name,
-                )
-
-            if name not in disabled_bones:
-                bone = armature.pose.bones[name]
-                bone.rotation_quaternion = base_skeleton[name] @ Quaternion(rotation.rotation)
-                bone.keyframe_insert(
-                    data_path="rotation_quaternion",
-                    frame=last_frame,
-                    group=name,
-                )
-    if action.transition.reset:
-        last_frame = last_frame + action.transition.reset_length
-        for name, rotation in base_skeleton.items():
-            if name not in disabled_bones:
-                bone = armature.pose.bones[name]
-                bone.rotation_quaternion = rotation
-                bone.keyframe_insert(
-                    data_path="rotation_quaternion",
-                    frame=last_frame,
-                    group=name,
-                )
-    return last_frame + action.transition.length
+    # Bones of the animation, which can be in a different order than the skeleton, that the action animates
+    enabled = np.flatnonzero(action.enabled_mask(skeleton)[skeleton.inverse_permutation(order)])
+
+    timing = action.timing()
+    timing.rotations = animation.rotation_frames(timing.start, timing.end)[:, enabled]
+    timing.base = np.array([base_skeleton[order[i]] for i in enabled]).reshape((len(enabled), 4))
+    if action.use_movement and animation.has_movement:
+        timing.translations = animation.translations()
+    return timing, [order[i] for i in enabled]
+
+
+def insert_timeline(armature, names: List[str], timeline: composition.Timeline, keyframes: Keyframes) -> None:
+    """Adds keyframes of the timeline, names are the bones in the order of its rotations"""
+    for column, name in enumerate(names):
+        bone = armature.pose.bones[name]
+        bone.rotation_mode = "QUATERNION"
+        keyframes.insert(bone.path_from_id("rotation_quaternion"), name, timeline.frames, timeline.rotations[:, column])
+
+    if len(timeline.locations) > 0:
+        keyframes.insert("location", "root", timeline.location_frames, timeline.locations)
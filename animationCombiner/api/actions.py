@@ -1,8 +1,10 @@
 from enum import Enum
 
 import bpy
+import numpy as np
 from bpy.props import (
     IntProperty,
+    FloatVectorProperty,
     StringProperty,
     PointerProperty,
     BoolProperty,
@@ -13,9 +15,18 @@ from bpy.types import PropertyGroup
 
 from animationCombiner import get_preferences
 from animationCombiner.api.animation import Animation
-from animationCombiner.api.body_parts import BodyPartsConfiguration
+from animationCombiner.api.body_parts import BodyPartsConfiguration, read_mask, write_mask
+from animationCombiner.api.skeletons import Skeleton
+from animationCombiner.core import composition
 from animationCombiner.operators import SelectAllPartsOperator, SelectNoPartsOperator
-from animationCombiner.utils import copy, on_actions_update, update_errors, complete_update
+from animationCombiner.utils import (
+    copy,
+    on_actions_update,
+    update_errors,
+    complete_update,
+    mark_all_dirty,
+    on_parts_update,
+)
 
 
 class LengthGroup(bpy.types.PropertyGroup):
@@ -73,7 +84,7 @@ class LengthGroup(bpy.types.PropertyGroup):
 
     @property
     def real_length(self):
-        return (self.end - self.start) * self.slowdown
+        return composition.Action(self.start, self.end, self.slowdown).real_length
 
 
 class TransitionGroup(bpy.types.PropertyGroup):
@@ -109,7 +120,10 @@ class TransitionGroup(bpy.types.PropertyGroup):
 
     @property
     def real_length(self):
-        return self.length - 1 + (self.reset_length if self.reset else 0)
+        return self.to_transition().real_length
+
+    def to_transition(self) -> composition.Transition:
+        return composition.Transition(self.length, self.reset, self.reset_length)
 
 
 def get_body_parts(self):
@@ -122,7 +136,7 @@ def get_body_parts(self):
 
 
 class EnabledPartsCollection(bpy.types.PropertyGroup):
-    checked: BoolProperty(name="", default=True, update=update_errors)
+    checked: BoolProperty(name="", default=True, update=on_parts_update)
     name: StringProperty()
     uuid: StringProperty()
 
@@ -130,6 +144,9 @@ class EnabledPartsCollection(bpy.types.PropertyGroup):
 class Action(PropertyGroup):
     """Single action that will be applied"""
 
+    # Custom property with the cached mask of bones which the action animates
+    ENABLED_MASK = "enabled_mask"
+
     name: StringProperty(name="Name", default="Unknown")
     length_group: PointerProperty(type=LengthGroup)
     transition: PointerProperty(type=TransitionGroup)
@@ -146,10 +163,11 @@ class Action(PropertyGroup):
     )
     use_skeleton: BoolProperty(
         default=False,
-        update=update_errors,
+        update=mark_all_dirty,
         name="Use skeleton",
         description="True, if this Action should have its skeleton used as base for the entire animation. Only one Action can have this set globally.",
     )
+    dirty: BoolProperty(default=True, description="True, if the action changed since it was last applied")
 
     def regenerate_parts(self, config: BodyPartsConfiguration):
         # TODO reuse existing config
@@ -158,6 +176,26 @@ class Action(PropertyGroup):
             new_part = self.body_parts.add()
             new_part.name = part.name
             new_part.uuid = part.get_uuid()
+        self.pop(self.ENABLED_MASK, None)
+
+    def enabled_mask(self, skeleton: Skeleton) -> np.ndarray:
+        """
+        Bones which the action animates as a boolean mask in the skeleton order, that is all bones except for the root
+        and bones of unchecked parts. It is cached until a part is checked or unchecked.
+        """
+        mask = read_mask(self, self.ENABLED_MASK, skeleton)
+        if mask is None:
+            mask = ~self.id_data.body_parts.disabled_mask(self.body_parts, skeleton)
+            mask[skeleton.index["root"]] = False
+            write_mask(self, self.ENABLED_MASK, mask)
+        return mask
+
+    def timing(self) -> composition.Action:
+        """Action for the composition without arrays, they are needed only for timelines, not for lengths"""
+        length_group = self.length_group
+        return composition.Action(
+            length_group.start, length_group.end, length_group.slowdown, self.transition.to_transition(), self.enabled
+        )
 
     def draw(self, layout):
         row = layout.column_flow(columns=1)
@@ -208,6 +246,16 @@ class ActionGroup(PropertyGroup):
     length: IntProperty(default=0, min=0)
     actions_count: IntProperty(default=0, min=0)
     errors: CollectionProperty(type=GroupErrors)
+    dirty: BoolProperty(default=True, description="True, if the group changed since it was last applied")
+    # Frames and location of the Armature which the group had when it was last applied
+    applied_start: IntProperty(default=0)
+    applied_end: IntProperty(default=0)
+    applied_location: FloatVectorProperty(size=3)
+    applied_movement: FloatVectorProperty(size=3)
+
+    @property
+    def needs_apply(self):
+        return self.dirty or any(action.dirty for action in self.actions)
 
     @classmethod
     def register(cls):
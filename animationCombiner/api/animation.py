@@ -1,75 +1,185 @@
 from functools import cached_property
+from typing import Dict
 
-from bpy.props import FloatVectorProperty, CollectionProperty, StringProperty
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+from bpy.props import IntProperty, StringProperty
 from bpy.types import PropertyGroup
-from mathutils import Vector
 
 from animationCombiner.api.model import RawAnimation, Pose
 from animationCombiner.api.skeletons import Skeleton
-from animationCombiner.utils.poses import normalize_poses
-from animationCombiner.utils.rotation import calculate_frames
-
-EMPTY_VECTOR = Vector((0, 0, 0))
-
-
-class CoordsProperty(PropertyGroup):
-    coords: FloatVectorProperty(size=3, precision=6, subtype="COORDINATES", unit="NONE")
-
-
-class TranslationProperty(PropertyGroup):
-    translation: FloatVectorProperty(size=3, precision=6, subtype="TRANSLATION", unit="NONE")
-
-
-class RotationProperty(PropertyGroup):
-    rotation: FloatVectorProperty(size=4, precision=6, subtype="QUATERNION", unit="ROTATION")
-
-
-class Rotations(PropertyGroup):
-    rotations: CollectionProperty(type=RotationProperty)
+from animationCombiner.core import clip
 
 
 class Animation(PropertyGroup):
-    raw_order: StringProperty()
-
-    skeleton: CollectionProperty(type=CoordsProperty)
-    movement: CollectionProperty(type=TranslationProperty)
-    animation: CollectionProperty(type=Rotations)
+    """
+    Single animation clip. Bulk data are not stored as a PropertyGroup per vector, but as flat float arrays in custom
+    properties, their shape is given by the number of bones in order and by the length.
+    Arrays are kept in the ClipLibrary of the Armature, the Animation only refers to them, older files have them inline.
+    """
+
+    ROTATIONS = clip.ROTATIONS
+    TRANSLATIONS = clip.TRANSLATIONS
+    SKELETON = clip.SKELETON
+    # Keys of CollectionProperties used by the old layout
+    LEGACY = ("skeleton", "movement", "animation")
 
-    def from_raw(self, raw_animation: RawAnimation, skeleton: Skeleton):
-        self.raw_order = ",".join(skeleton.order())
+    raw_order: StringProperty()
+    frame_count: IntProperty(name="Frames", description="Number of frames with rotations", min=0)
+    clip: StringProperty(description="Key of the clip in the ClipLibrary")
 
-        normalized, translations = normalize_poses(raw_animation.poses)
+    @classmethod
+    def register(cls):
+        bpy.app.handlers.load_post.append(migrate_animations)
 
-        first_pose = normalized[0]
-        for bone in skeleton.order():
-            pos = self.skeleton.add()
-            pos.coords = first_pose.bones[bone]
+    @classmethod
+    def unregister(cls):
+        bpy.app.handlers.load_post.remove(migrate_animations)
 
-        has_translations = any(vec != EMPTY_VECTOR for vec in translations)
-        if has_translations:
-            for translation in translations:
-                move = self.movement.add()
-                move.translation = translation
+    def from_arrays(self, arrays: Dict[str, np.ndarray], skeleton: Skeleton):
+        """Stores arrays created by convert, identical arrays are shared with other Animations"""
+        self.release()
+        self.raw_order = ",".join(skeleton.order())
+        self.frame_count = len(arrays[self.ROTATIONS])
+        self.clip = self.clip_library.acquire(arrays, skeleton.order())
+        self.clear_arrays()
+
+    def copy_from(self, other: "Animation") -> None:
+        """Copies the clip, shared arrays are only referenced, inline ones are copied as whole buffers"""
+        self.release()
+        self.raw_order = other.raw_order
+        self.frame_count = other.frame_count
+        self.clip = other.clip
+        if self.clip and other.id_data == self.id_data:
+            self.clip_library.add_user(self.clip)
+        elif self.clip:
+            source = other.source()
+            arrays = {key: np.asarray(source[key]) for key in clip.STORED if key in source}
+            self.clip = self.clip_library.acquire(arrays, self.order)
+        for key in clip.STORED:
+            data = other.get(key)
+            if data is not None:
+                self.write(key, np.asarray(data))
+            elif key in self:
+                del self[key]
+
+    def release(self) -> None:
+        """Stops using the shared clip, it is removed from the library on save if no other Animation uses it"""
+        if self.clip:
+            self.clip_library.release(self.clip)
+            self.clip = ""
+
+    def clear_arrays(self) -> None:
+        for key in clip.STORED:
+            if key in self:
+                del self[key]
 
-        # Should fix rotation errors
-        frames = calculate_frames(normalized)
-        for frame in frames:
-            anim = self.animation.add()
-            for bone in skeleton.order():
-                rotation = anim.rotations.add()
-                rotation.rotation = frame[bone]
+    @property
+    def clip_library(self):
+        return self.id_data.clip_library
+
+    def source(self):
+        """Holder of the arrays, either the shared ClipEntry or the Animation itself"""
+        entry = self.clip_library.find(self.clip) if self.clip else None
+        return self if entry is None else entry
+
+    def read(self, key: str, shape) -> np.ndarray:
+        """Reads array stored in the custom property, raises ValueError if the clip does not have it"""
+        data = self.source().get(key)
+        if data is None:
+            raise ValueError(f"Clip {self.clip} is missing, import the action again")
+        return np.array(data, dtype=np.float32).reshape(shape)
+
+    def write(self, key: str, data) -> None:
+        """Stores array as a flat float array in the custom property"""
+        self[key] = np.ascontiguousarray(data, dtype=np.float32).ravel()
+
+    def migrate(self) -> None:
+        """
+        Converts data from the old layouts, which had a PropertyGroup for every vector, arrays in the Animation itself
+        or clips in a library of the Scene, into arrays in the ClipLibrary of the Armature
+        """
+        self.migrate_legacy()
+        if self.clip and self.clip_library.find(self.clip) is None:
+            self.migrate_scene_clip()
+        if not self.clip and any(key in self for key in clip.STORED):
+            arrays = {key: np.asarray(self[key]) for key in clip.STORED if key in self}
+            self.clip = self.clip_library.acquire(arrays, self.order)
+            self.clear_arrays()
+
+    def migrate_scene_clip(self) -> None:
+        """Copies arrays of the clip from the libraries of Scenes, which were not registered anymore"""
+        for scene in bpy.data.scenes:
+            for entry in scene.get("clip_library", {}).get("clips", []):
+                if entry.get("name") == self.clip:
+                    for key in clip.STORED:
+                        if key in entry:
+                            self[key] = entry[key]
+                    self.clip = ""
+                    return
+
+    def migrate_legacy(self) -> None:
+        skeleton, movement, animation = (self.get(key) for key in self.LEGACY)
+        if skeleton is None and movement is None and animation is None:
+            return
+
+        if skeleton is not None:
+            self.write(self.SKELETON, [item.get("coords", (0, 0, 0)) for item in skeleton])
+        if movement:
+            self.write(self.TRANSLATIONS, [item.get("translation", (0, 0, 0)) for item in movement])
+        if animation is not None:
+            frames = [
+                [rotation.get("rotation", (0, 0, 0, 0)) for rotation in frame.get("rotations", [])]
+                for frame in animation
+            ]
+            self.frame_count = len(frames)
+            self.write(self.ROTATIONS, frames)
+
+        for key in self.LEGACY:
+            if key in self:
+                del self[key]
 
     @cached_property
     def order(self):
         return self.raw_order.split(",")
 
+    @property
+    def is_missing(self) -> bool:
+        """True if the arrays of the clip are not in the library, e.g. when the file was changed by hand"""
+        source = self.source()
+        return source.get(self.ROTATIONS) is None or source.get(self.SKELETON) is None
+
     @property
     def has_movement(self):
-        return len(self.movement) > 0
+        return self.source().get(self.TRANSLATIONS) is not None
 
     @property
     def length(self):
-        return len(self.animation)
+        return self.frame_count
+
+    def rotation_frames(self, start=0, end=None) -> np.ndarray:
+        """Rotations of all bones in frames from start to end as (frames, bones, 4) array"""
+        return self.read(self.ROTATIONS, (self.length, len(self.order), 4))[start:end]
+
+    def translations(self) -> np.ndarray:
+        """Translations of the root in all frames as (frames, 3) array"""
+        return self.read(self.TRANSLATIONS, (-1, 3)) if self.has_movement else np.zeros((0, 3), dtype=np.float32)
 
     def initial_pose(self):
-        return Pose({name: coords.coords for name, coords in zip(self.order, self.skeleton)})
+        positions = self.read(self.SKELETON, (len(self.order), 3))
+        return Pose(positions, {name: i for i, name in enumerate(self.order)})
+
+
+def convert(raw_animation: RawAnimation, skeleton: Skeleton) -> Dict[str, np.ndarray]:
+    """Calculates all arrays that are stored in the Animation, translations are left out if there is no movement"""
+    return clip.convert(raw_animation.positions[:, skeleton.permutation(raw_animation.names)], skeleton.parents)
+
+
+@persistent
+def migrate_animations(*_args):
+    """Migrates animations of all armatures in the loaded file into the current layout"""
+    for armature in bpy.data.armatures:
+        for group in armature.groups:
+            for action in group.actions:
+                action.animation.migrate()
@@ -1,14 +1,42 @@
+from typing import Dict
 from uuid import uuid4
 
+import numpy as np
 from bpy.props import StringProperty, CollectionProperty, IntProperty
 from bpy.types import PropertyGroup
 
+from animationCombiner import get_preferences
+from animationCombiner.api.skeletons import Skeleton
+
+
+def invalidate_masks(self=None, context=None):
+    """Drops cached masks of all configured body parts, bones can be edited only in preferences"""
+    for config in get_preferences().body_parts_config:
+        for part in config.body_parts:
+            part.pop(BodyPart.MASK, None)
+
+
+def read_mask(prop, key: str, skeleton: Skeleton):
+    """Reads boolean mask stored in the custom property, None if there is none for the skeleton"""
+    mask = prop.get(key)
+    if mask is None or len(mask) != len(skeleton.bones):
+        return None
+    return np.array(mask, dtype=bool)
+
+
+def write_mask(prop, key: str, mask: np.ndarray) -> None:
+    """Stores boolean mask in the custom property, ID properties do not support booleans in all versions"""
+    prop[key] = mask.astype(np.int32)
+
 
 class Bone(PropertyGroup):
-    bone: StringProperty()
+    bone: StringProperty(update=invalidate_masks)
 
 
 class BodyPart(PropertyGroup):
+    # Custom property with the cached mask of bones
+    MASK = "mask"
+
     bones: CollectionProperty(type=Bone)
     name: StringProperty()
     uuid: StringProperty()
@@ -19,6 +47,28 @@ class BodyPart(PropertyGroup):
             self.uuid = str(uuid4())
         return self.uuid
 
+    def mask(self, skeleton: Skeleton) -> np.ndarray:
+        """Bones of the part as a boolean mask in the skeleton order, it is cached until bones of the part change"""
+        mask = read_mask(self, self.MASK, skeleton)
+        if mask is None:
+            mask = np.zeros(len(skeleton.bones), dtype=bool)
+            mask[[skeleton.index[bone.bone] for bone in self.bones if bone.bone in skeleton.index]] = True
+            write_mask(self, self.MASK, mask)
+        return mask
+
 
 class BodyPartsConfiguration(PropertyGroup):
     body_parts: CollectionProperty(type=BodyPart)
+
+    def masks(self, skeleton: Skeleton) -> Dict[str, np.ndarray]:
+        """Masks of all body parts by their uuid"""
+        return {part.uuid: part.mask(skeleton) for part in self.body_parts}
+
+    def disabled_mask(self, enabled_parts, skeleton: Skeleton) -> np.ndarray:
+        """Mask of bones of all parts which are not checked in the EnabledPartsCollection"""
+        masks = self.masks(skeleton)
+        disabled = np.zeros(len(skeleton.bones), dtype=bool)
+        for part in enabled_parts:
+            if not part.checked and part.uuid in masks:
+                disabled |= masks[part.uuid]
+        return disabled
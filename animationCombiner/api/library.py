@@ -0,0 +1,91 @@
+"""
+Library of clips shared by all Actions of an Armature. Clips are stored once per content, Actions only refer to them
+by the key, so the same file imported many times costs only one clip in the .blend file. The library is a part of the
+Armature data, so it is copied, appended and linked together with the Actions that use it.
+"""
+from typing import Dict, List, Optional
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+from bpy.props import CollectionProperty, IntProperty, PointerProperty
+from bpy.types import PropertyGroup
+
+from animationCombiner.core import clip
+
+
+class ClipEntry(PropertyGroup):
+    """Arrays of a single clip, stored as flat float custom properties same as in Animation. Name is the key"""
+
+    users: IntProperty(default=0, min=0, description="Number of Animations that use the clip")
+
+    def write(self, arrays: Dict[str, np.ndarray]) -> None:
+        for key in clip.STORED:
+            if key in arrays:
+                self[key] = np.ascontiguousarray(arrays[key], dtype=np.float32).ravel()
+
+
+class ClipLibrary(PropertyGroup):
+    clips: CollectionProperty(type=ClipEntry)
+
+    @classmethod
+    def register(cls):
+        bpy.types.Armature.clip_library = PointerProperty(type=ClipLibrary)
+        bpy.app.handlers.save_pre.append(purge_clips)
+
+    @classmethod
+    def unregister(cls):
+        bpy.app.handlers.save_pre.remove(purge_clips)
+        del bpy.types.Armature.clip_library
+
+    def find(self, key: str) -> Optional[ClipEntry]:
+        return self.clips.get(key)
+
+    def acquire(self, arrays: Dict[str, np.ndarray], order: List[str]) -> str:
+        """Adds a user to the clip with the arrays, the clip is stored only if there is none with the same content"""
+        key = clip.content_key(arrays, order)
+        entry = self.find(key)
+        if entry is None:
+            entry = self.clips.add()
+            entry.name = key
+            entry.write(arrays)
+        entry.users += 1
+        return key
+
+    def add_user(self, key: str) -> None:
+        entry = self.find(key)
+        if entry is not None:
+            entry.users += 1
+
+    def release(self, key: str) -> None:
+        entry = self.find(key)
+        if entry is not None and entry.users > 0:
+            entry.users -= 1
+
+    def recount(self) -> None:
+        """Counts users of all clips again from all Actions, so the counts are correct even after undo"""
+        users = {}
+        for group in self.id_data.groups:
+            for action in group.actions:
+                if action.animation.clip:
+                    users[action.animation.clip] = users.get(action.animation.clip, 0) + 1
+        for entry in self.clips:
+            entry.users = users.get(entry.name, 0)
+
+    def purge(self) -> int:
+        """Removes clips without users, returns how many were removed"""
+        removed = 0
+        for index in reversed(range(len(self.clips))):
+            if self.clips[index].users == 0:
+                self.clips.remove(index)
+                removed += 1
+        return removed
+
+
+@persistent
+def purge_clips(*_args):
+    """Removes clips, which are not used by any Action anymore, before the file is saved"""
+    for armature in bpy.data.armatures:
+        if armature.library is None:
+            armature.clip_library.recount()
+            armature.clip_library.purge()
@@ -1,25 +1,76 @@
-from dataclasses import dataclass
-from typing import Dict, List
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List
 
+import numpy as np
 from mathutils import Vector
 
-from animationCombiner.api.skeletons import Skeleton
+
+class PoseBones(MutableMapping):
+    """Positions of bones in a Pose accessible by name, values are converted to Vectors only when they are accessed"""
+
+    __slots__ = ("positions", "index")
+
+    def __init__(self, positions: np.ndarray, index: Dict[str, int]) -> None:
+        self.positions = positions
+        self.index = index
+
+    def __getitem__(self, name: str) -> Vector:
+        return Vector(self.positions[self.index[name]])
+
+    def __setitem__(self, name: str, position) -> None:
+        self.positions[self.index[name]] = position
+
+    def __delitem__(self, name: str) -> None:
+        raise TypeError("Bones cannot be removed from a Pose")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
 
 
-@dataclass
 class Pose:
-    """Positions of all bones in a specific frame"""
+    """Positions of all bones in a specific frame, usually a view into the array of a RawAnimation"""
 
-    bones: Dict[str, Vector]
+    __slots__ = ("positions", "index")
+
+    def __init__(self, positions: np.ndarray, index: Dict[str, int]) -> None:
+        """
+        :param positions: (bones, 3) positions of bones
+        :param index: name of the bone -> its row in positions
+        """
+        self.positions = positions
+        self.index = index
+
+    @property
+    def bones(self) -> PoseBones:
+        """Positions of bones by their names, changes are written into the positions"""
+        return PoseBones(self.positions, self.index)
+
+    def take(self, order: List[str]) -> np.ndarray:
+        """Positions of bones in the order as (bones, 3) array"""
+        return self.positions[[self.index[name] for name in order]]
 
 
-@dataclass
 class RawAnimation:
-    """List of Poses of a specific skeleton"""
+    """Positions of all bones of a specific skeleton, stored as a single (frames, bones, 3) array"""
+
+    __slots__ = ("positions", "names", "index")
+
+    def __init__(self, positions: np.ndarray, names: List[str]) -> None:
+        self.positions = positions
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+
+    def bone(self, name: str) -> np.ndarray:
+        """Positions of the bone in all frames as (frames, 3) view"""
+        return self.positions[:, self.index[name]]
 
-    poses: List[Pose]
-    skeleton: Skeleton
+    def take(self, order: List[str]) -> np.ndarray:
+        """Positions of bones in the order as (frames, bones, 3) array"""
+        return self.positions[:, [self.index[name] for name in order]]
 
     @property
     def length(self):
-        return len(self.poses)
+        return len(self.positions)
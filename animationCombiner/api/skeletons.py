@@ -1,6 +1,9 @@
 from functools import cached_property
-from typing import Dict, List
+from typing import Dict, List, Sequence, Tuple
 
+import numpy as np
+
+from animationCombiner.core.kinematics import hierarchy_levels
 from animationCombiner.utils import Singleton
 
 
@@ -9,6 +12,8 @@ class Skeleton:
 
     def __init__(self, relations: Dict[str, List[str]]) -> None:
         self.relations = relations
+        self._permutations: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._inverse_permutations: Dict[Tuple[str, ...], np.ndarray] = {}
         super().__init__()
 
     @cached_property
@@ -27,6 +32,42 @@ class Skeleton:
     def order(self) -> List[str]:
         return self.bones
 
+    @cached_property
+    def index(self) -> Dict[str, int]:
+        """Name of the bone -> its index in the order"""
+        return {name: i for i, name in enumerate(self.bones)}
+
+    @cached_property
+    def parents(self) -> np.ndarray:
+        """Index of the parent of every bone in the order, -1 for the root"""
+        parents = np.full(len(self.bones), -1)
+        for parent, children in self.relations.items():
+            parents[[self.index[child] for child in children]] = self.index[parent]
+        return parents
+
+    @cached_property
+    def levels(self) -> List[np.ndarray]:
+        """Indices of bones for every depth in the hierarchy except for the root, bones in a level are independent"""
+        return hierarchy_levels(self.parents)
+
+    def permutation(self, names: Sequence[str]) -> np.ndarray:
+        """
+        Index of every bone of the skeleton in the names, e.g. MESSIF NAMES. Indexing arrays in the names order with it
+        gives arrays in the skeleton order. The result is computed only once for every order of names.
+        """
+        key = tuple(names)
+        if key not in self._permutations:
+            index = {name: i for i, name in enumerate(key)}
+            self._permutations[key] = np.array([index[name] for name in self.bones], dtype=int)
+        return self._permutations[key]
+
+    def inverse_permutation(self, names: Sequence[str]) -> np.ndarray:
+        """Index of every bone in the names in the skeleton order, converts arrays in the skeleton order into names"""
+        key = tuple(names)
+        if key not in self._inverse_permutations:
+            self._inverse_permutations[key] = np.array([self.index[name] for name in key], dtype=int)
+        return self._inverse_permutations[key]
+
 
 class HDMSkeleton(Skeleton, metaclass=Singleton):
     """Skeleton from HDM05 data set"""
@@ -0,0 +1,70 @@
+"""
+Headless composition driven by a declarative spec, for generating many sequences without the UI:
+
+    blender -b --python animationCombiner/cli.py -- spec.json [--workers N]
+
+The spec is a JSON or TOML file with one composition, or a list of them under "compositions":
+
+    {
+        "compositions": [
+            {
+                "name": "walk_and_wave",
+                "output": "out/walk_and_wave.data",
+                "coordinates": {"up": "Y", "forward": "Z"},
+                "export": {"key": "walk_and_wave", "precision": 6, "disabled_parts": ["Left Hand"]},
+                "groups": [
+                    {
+                        "actions": [
+                            {"file": "walk.data", "use_skeleton": true, "use_movement": true, "slowdown": 2},
+                            {"file": "wave.amc", "asf": "subject.asf", "start": 10, "end": 200,
+                             "body_parts": {"Left Leg": false, "Right Leg": false}}
+                        ]
+                    },
+                    {"actions": [{"file": "run.bvh", "transition": {"length": 10, "reset": true}}]}
+                ]
+            }
+        ]
+    }
+
+Export uses the same coordinates as import, unless it has its own. Relative paths are resolved against the directory
+of the spec. Files are parsed in worker processes, each file only once per run, compositions with files that could not
+be loaded are skipped.
+
+This module is only the launcher, the work is done by animationCombiner.headless. Worker processes are spawned and run
+this file again, so it must not import bpy or the add-on at the top level.
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+ADDON = "animationCombiner"
+
+
+def enable_addon() -> None:
+    """Enables the add-on, so its properties and operators are registered even in a clean Blender"""
+    import addon_utils  # pylint: disable=import-outside-toplevel
+    import bpy  # pylint: disable=import-outside-toplevel
+
+    if ADDON not in bpy.context.preferences.addons:
+        addon_utils.enable(ADDON, default_set=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="animationCombiner.cli", description="Composes animations from a spec")
+    parser.add_argument("spec", help="JSON or TOML file with compositions")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes which parse files")
+    args = parser.parse_args(argv)
+
+    enable_addon()
+    from animationCombiner.headless import run  # pylint: disable=import-outside-toplevel
+
+    return run(args.spec, args.workers)
+
+
+if __name__ == "__main__":
+    # Started by blender --python, the add-on might not be installed, so it is imported from the repository
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.exit(main())
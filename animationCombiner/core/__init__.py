@@ -0,0 +1 @@
+"""Parts of the plugin that do not need Blender, they work only with plain Python and NumPy data"""
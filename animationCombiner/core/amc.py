@@ -0,0 +1,188 @@
+"""
+Vectorized reader of ASF/AMC motion capture. The skeleton is parsed by animationCombiner.parsers.amc_parser and
+converted into arrays, AMC frames are parsed into a single (frames, dofs) array and positions of all joints are then
+computed for all frames at once.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from animationCombiner.core.kinematics import euler_matrices, hierarchy_levels
+from animationCombiner.core.text import parse_numbers
+
+# AMC files do not contain the order of root channels, it is given by ":root order" in ASF, which is almost always this
+ROOT_DOFS = ("tx", "ty", "tz", "rx", "ry", "rz")
+FRAME_NUMBER = re.compile(r"^[ \t]*\d+[ \t]*\r?$", re.MULTILINE)
+BONE_NAME = re.compile(r"^[ \t]*[A-Za-z_]\S*", re.MULTILINE)
+# Number of frames in chunks yielded by iter_motion and number of characters read from the file at once
+CHUNK_FRAMES = 4096
+BLOCK_SIZE = 1 << 22
+
+
+@dataclass(frozen=True)
+class AsfSkeleton:
+    """Skeleton from an ASF file as arrays, bones are in a hierarchical order (parent is always before its children)"""
+
+    names: List[str]
+    parents: np.ndarray
+    # Vector from the parent joint to the joint in the rest pose, (bones, 3)
+    offsets: np.ndarray
+    # Rotation of the local axes of every bone and its inverse, (bones, 3, 3)
+    C: np.ndarray
+    Cinv: np.ndarray
+    # Names of channels of every bone in the order of values in AMC
+    dofs: List[Tuple[str, ...]]
+    # Indices of bones for every depth in the hierarchy, except for the root
+    levels: List[np.ndarray]
+    # Mapping of columns for every frame layout that was already used, see columns
+    _columns: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_joints(cls, joints: dict) -> "AsfSkeleton":
+        """Converts Joints created by amc_parser.parse_asf"""
+        order = [joints["root"]]
+        for joint in order:
+            order.extend(joint.children)
+        index = {joint.name: i for i, joint in enumerate(order)}
+        parents = np.array([index[joint.parent.name] if joint.parent else -1 for joint in order], dtype=int)
+        return cls(
+            names=[joint.name for joint in order],
+            parents=parents,
+            offsets=np.array([joint.length * np.ravel(joint.direction) for joint in order], dtype=np.float64),
+            C=np.array([joint.C for joint in order], dtype=np.float64),
+            Cinv=np.array([joint.Cinv for joint in order], dtype=np.float64),
+            dofs=[ROOT_DOFS if joint.parent is None else tuple(joint.dof) for joint in order],
+            levels=hierarchy_levels(parents),
+        )
+
+    def columns(self, layout: List[Tuple[str, int]]) -> Dict[str, np.ndarray]:
+        """
+        Maps columns of AMC frames onto the skeleton, the mapping is computed only once for every layout.
+        :param layout: name and number of values of every line in a frame
+        :return: bone, axis and column of every rotation channel and columns of the root translation
+        """
+        layout = tuple(layout)
+        if layout not in self._columns:
+            self._columns[layout] = self._map_columns(layout)
+        return self._columns[layout]
+
+    def _map_columns(self, layout: Tuple[Tuple[str, int], ...]) -> Dict[str, np.ndarray]:
+        index = {name: i for i, name in enumerate(self.names)}
+        bones, axes, rotations, translations = [], [], [], [0, 0, 0]
+        column = 0
+        for name, count in layout:
+            if name not in index:
+                raise ValueError(f"Bone {name} is not in the skeleton")
+            dofs = self.dofs[index[name]]
+            if len(dofs) != count:
+                raise ValueError(f"Bone {name} has {count} values, but {len(dofs)} degrees of freedom")
+            for dof in dofs:
+                axis = "xyz".index(dof[-1].lower())
+                if dof[0].lower() == "t":
+                    translations[axis] = column
+                else:
+                    bones.append(index[name])
+                    axes.append(axis)
+                    rotations.append(column)
+                column += 1
+        return {
+            "bones": np.array(bones, dtype=int),
+            "axes": np.array(axes, dtype=int),
+            "rotations": np.array(rotations, dtype=int),
+            "translations": np.array(translations, dtype=int),
+        }
+
+
+def read_motion(
+    text: str, dtype=np.float64, layout: Optional[List[Tuple[str, int]]] = None
+) -> Tuple[Optional[List[Tuple[str, int]]], np.ndarray]:
+    """
+    Parses all frames of AMC into (frames, values) array, returns it with the layout of a frame.
+    :param layout: layout of frames, if it is already known from previous frames
+    """
+    header = text.find(":DEGREES")
+    if header >= 0:
+        text = text[text.find("\n", header) + 1 :]
+    frames = list(FRAME_NUMBER.finditer(text))
+    if len(frames) == 0:
+        return layout, np.zeros((0, 0), dtype=dtype)
+
+    if layout is None:
+        first = text[frames[0].end() : frames[1].start() if len(frames) > 1 else len(text)]
+        layout = [(line.split()[0], len(line.split()) - 1) for line in first.splitlines() if line.strip()]
+    values = sum(count for _, count in layout)
+
+    numbers = parse_numbers(BONE_NAME.sub("", FRAME_NUMBER.sub("", text[frames[0].start() :])), dtype)
+    if numbers.size != len(frames) * values:
+        raise ValueError("Frames of the AMC file do not have the same number of values")
+    return layout, numbers.reshape((len(frames), values))
+
+
+def iter_motion(
+    file: TextIO, chunk_frames: int = CHUNK_FRAMES, dtype=np.float64
+) -> Iterator[Tuple[List[Tuple[str, int]], np.ndarray]]:
+    """
+    Reads AMC frames from the file in blocks and yields them as (chunk_frames, values) arrays, the last one can be
+    shorter. Only a block of text and a chunk of frames are held in memory at once.
+    """
+    layout = None
+    text = ""
+    pending = []
+    pending_frames = 0
+    while True:
+        block = file.read(BLOCK_SIZE)
+        text += block
+        # Last frame might be incomplete, it is parsed together with the next block
+        last = None
+        for last in FRAME_NUMBER.finditer(text):
+            pass
+        end = len(text) if not block else (last.start() if last else 0)
+        if end > 0:
+            layout, motion = read_motion(text[:end], dtype, layout)
+            text = text[end:]
+            if len(motion) > 0:
+                pending.append(motion)
+                pending_frames += len(motion)
+
+        while pending_frames >= chunk_frames or (not block and pending_frames > 0):
+            motion = np.concatenate(pending)
+            yield layout, motion[:chunk_frames]
+            pending = [motion[chunk_frames:]]
+            pending_frames = len(pending[0])
+        if not block:
+            return
+
+
+def forward_kinematics(skeleton: AsfSkeleton, motion: np.ndarray, layout: List[Tuple[str, int]]) -> np.ndarray:
+    """Calculates positions of all joints in all frames as (frames, bones, 3) array"""
+    columns = skeleton.columns(layout)
+    angles = np.zeros((len(motion), len(skeleton.names), 3))
+    angles[:, columns["bones"], columns["axes"]] = np.deg2rad(motion[:, columns["rotations"]])
+    local = skeleton.C @ euler_matrices(angles, "XYZ") @ skeleton.Cinv
+
+    root = np.argmax(skeleton.parents < 0)
+    matrices = np.empty_like(local)
+    positions = np.empty(local.shape[:-1])
+    matrices[:, root] = local[:, root]
+    positions[:, root] = motion[:, columns["translations"]]
+    for bones in skeleton.levels:
+        parents = skeleton.parents[bones]
+        matrices[:, bones] = matrices[:, parents] @ local[:, bones]
+        positions[:, bones] = positions[:, parents] + np.einsum(
+            "fbij,bj->fbi", matrices[:, bones], skeleton.offsets[bones]
+        )
+    return positions
+
+
+def parse(file: TextIO, skeleton: AsfSkeleton, order: Optional[List[str]] = None, dtype=np.float64) -> List[np.ndarray]:
+    """
+    Parses positions of all joints from the AMC file, the list contains only one object, same as for other formats.
+    :param order: names of bones in the order in which they should be returned, defaults to the skeleton order
+    """
+    chunks = [forward_kinematics(skeleton, motion, layout) for layout, motion in iter_motion(file, dtype=dtype)]
+    positions = np.concatenate(chunks) if chunks else np.zeros((0, len(skeleton.names), 3), dtype=dtype)
+    if order is not None:
+        positions = positions[:, [skeleton.names.index(name) for name in order]]
+    return [positions]
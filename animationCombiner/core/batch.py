@@ -0,0 +1,69 @@
+"""Loads clips from files in worker processes, nothing here needs Blender, so it can run outside of it"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from animationCombiner.core import clip, coordinates
+from animationCombiner.core.cache import ClipCache
+
+
+@dataclass(frozen=True)
+class ClipJob:
+    """Everything that is needed to load a single clip, it needs to be picklable"""
+
+    path: str
+    # Parses all objects in the file into (frames, bones, 3) arrays, has to be a module level function or a partial
+    parse: Callable[[TextIO], List[np.ndarray]]
+    # Index of every bone of the skeleton in the parsed arrays
+    permutation: np.ndarray
+    parents: np.ndarray
+    # Converts positions into Blender coordinates, see core.coordinates
+    matrix: Optional[np.ndarray] = None
+    cache: Optional[ClipCache] = None
+    # Import settings which are part of the cache key
+    settings: tuple = ()
+
+
+def load_clip(job: ClipJob) -> Dict[str, np.ndarray]:
+    """Parses the first object in the file and converts it, the result is cached if the job has a cache"""
+    if job.cache is not None:
+        key = job.cache.key(job.path, *job.settings)
+        arrays = job.cache.get(key)
+        if arrays is not None:
+            return arrays
+
+    with open(job.path, "r") as file:
+        positions = job.parse(file)[0]
+    if job.matrix is not None:
+        positions = coordinates.convert(positions, job.matrix)
+
+    arrays = clip.convert(positions[:, job.permutation], job.parents)
+    if job.cache is not None:
+        job.cache.put(key, arrays)
+    return arrays
+
+
+def _load_copy(job: ClipJob) -> Dict[str, np.ndarray]:
+    """Same as load_clip, but memory-mapped arrays are read, so they can be sent to the main process"""
+    return {name: np.array(array) for name, array in load_clip(job).items()}
+
+
+def load_clips(
+    jobs: Iterable[ClipJob], max_workers: Optional[int] = None
+) -> Iterator[Tuple[ClipJob, Optional[Dict[str, np.ndarray]], Optional[Exception]]]:
+    """
+    Loads all clips in a pool of processes and yields them in the order of jobs, together with the error if the clip
+    could not be loaded. Processes are spawned, as forking the process of Blender is not safe.
+    """
+    jobs = list(jobs)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = [executor.submit(_load_copy, job) for job in jobs]
+        for job, future in zip(jobs, futures):
+            try:
+                yield job, future.result(), None
+            except Exception as error:  # pylint: disable=broad-except
+                yield job, None, error
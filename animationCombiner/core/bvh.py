@@ -0,0 +1,169 @@
+"""
+Vectorized reader of BVH motion capture. The whole MOTION block is parsed at once into a (frames, channels) array
+and positions of all joints are then computed with forward kinematics for chunks of frames.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from animationCombiner.core.kinematics import AXES, euler_matrices, hierarchy_levels
+from animationCombiner.core.text import parse_numbers
+
+# Frames for which forward kinematics is computed at once, it limits size of temporary matrices
+CHUNK_FRAMES = 4096
+# End sites are joints without channels, they are named after their parent with this suffix
+END_SITE = "_end"
+
+
+@dataclass(frozen=True)
+class BvhSkeleton:
+    """Hierarchy of a BVH file, joints are in the order of the file, so parent is always before its children"""
+
+    names: List[str]
+    parents: np.ndarray
+    # Offset of every joint from its parent, (joints, 3)
+    offsets: np.ndarray
+    # Channels of every joint in the order of values in the MOTION block
+    channels: List[Tuple[str, ...]]
+
+    @property
+    def levels(self) -> List[np.ndarray]:
+        """Indices of joints for every depth in the hierarchy, except for roots"""
+        return hierarchy_levels(self.parents)
+
+    def rotation_groups(self) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+        """
+        Joints grouped by the order of their rotation channels.
+        :return: euler order for euler_matrices, indices of joints and (joints, axes) columns of their angles
+        """
+        groups = {}
+        column = 0
+        for joint, channels in enumerate(self.channels):
+            axes, columns = "", []
+            for channel in channels:
+                if channel.lower().endswith("rotation"):
+                    axes += channel[0].upper()
+                    columns.append(column)
+                column += 1
+            if axes:
+                groups.setdefault(axes, ([], []))
+                groups[axes][0].append(joint)
+                groups[axes][1].append(columns)
+        # Channels are listed in the order of intrinsic rotations, euler_matrices applies the first axis first
+        return [(axes[::-1], np.array(joints), np.array(columns)) for axes, (joints, columns) in groups.items()]
+
+    def translation_channels(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Joint, axis and column of every position channel"""
+        joints, axes, columns = [], [], []
+        column = 0
+        for joint, channels in enumerate(self.channels):
+            for channel in channels:
+                if channel.lower().endswith("position"):
+                    joints.append(joint)
+                    axes.append(AXES[channel[0].upper()])
+                    columns.append(column)
+                column += 1
+        return np.array(joints, dtype=int), np.array(axes, dtype=int), np.array(columns, dtype=int)
+
+
+def parse_hierarchy(text: str) -> BvhSkeleton:
+    """Parses the HIERARCHY block"""
+    tokens = text.split()
+    names, parents, offsets, channels = [], [], [], []
+    stack, joint = [], -1
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ("ROOT", "JOINT", "End"):
+            name = tokens[i + 1] if token != "End" else names[stack[-1]] + END_SITE
+            joint = len(names)
+            names.append(name)
+            parents.append(stack[-1] if stack else -1)
+            offsets.append((0.0, 0.0, 0.0))
+            channels.append(())
+            i += 2
+        elif token == "{":
+            stack.append(joint)
+            i += 1
+        elif token == "}":
+            stack.pop()
+            i += 1
+        elif token == "OFFSET":
+            offsets[joint] = tuple(float(value) for value in tokens[i + 1 : i + 4])
+            i += 4
+        elif token == "CHANNELS":
+            count = int(tokens[i + 1])
+            channels[joint] = tuple(tokens[i + 2 : i + 2 + count])
+            i += 2 + count
+        elif token == "HIERARCHY":
+            i += 1
+        else:
+            raise ValueError(f"Unexpected {token} in BVH hierarchy")
+    return BvhSkeleton(names, np.array(parents, dtype=int), np.array(offsets, dtype=np.float64), channels)
+
+
+def read(text: str, dtype=np.float64) -> Tuple[BvhSkeleton, np.ndarray]:
+    """Parses the skeleton and all frames of the MOTION block as (frames, channels) array"""
+    motion = text.find("MOTION")
+    if motion < 0:
+        raise ValueError("BVH file does not contain MOTION block")
+    skeleton = parse_hierarchy(text[:motion])
+
+    header = text[motion:].split("\n", 3)
+    if len(header) < 3 or not header[1].strip().startswith("Frames:") or not header[2].strip().startswith("Frame"):
+        raise ValueError("BVH file does not contain number of frames and frame time")
+    frames = int(header[1].split(":")[1])
+    values = parse_numbers(header[3] if len(header) > 3 else "", dtype)
+    channels = sum(len(joint) for joint in skeleton.channels)
+    if values.size != frames * channels:
+        raise ValueError(f"BVH file should have {frames} frames with {channels} channels")
+    return skeleton, values.reshape((frames, channels))
+
+
+def forward_kinematics(skeleton: BvhSkeleton, motion: np.ndarray) -> np.ndarray:
+    """Calculates positions of all joints in all frames as (frames, joints, 3) array"""
+    groups = skeleton.rotation_groups()
+    joints, axes, columns = skeleton.translation_channels()
+    levels = skeleton.levels
+    roots = np.flatnonzero(skeleton.parents < 0)
+
+    positions = np.empty((len(motion), len(skeleton.names), 3))
+    for start in range(0, len(motion), CHUNK_FRAMES):
+        chunk = motion[start : start + CHUNK_FRAMES]
+        local = np.zeros((len(chunk), len(skeleton.names), 3, 3))
+        local[...] = np.eye(3)
+        for order, group, group_columns in groups:
+            angles = np.zeros((len(chunk), len(group), 3))
+            angles[..., [AXES[axis] for axis in order[::-1]]] = np.deg2rad(chunk[:, group_columns])
+            local[:, group] = euler_matrices(angles, order)
+        # Position channels replace the offset
+        translations = np.repeat(skeleton.offsets[None], len(chunk), axis=0)
+        translations[:, joints, axes] = chunk[:, columns]
+
+        matrices = np.empty_like(local)
+        matrices[:, roots] = local[:, roots]
+        chunk_positions = positions[start : start + len(chunk)]
+        chunk_positions[:, roots] = translations[:, roots]
+        for level in levels:
+            parents = skeleton.parents[level]
+            matrices[:, level] = matrices[:, parents] @ local[:, level]
+            chunk_positions[:, level] = chunk_positions[:, parents] + np.einsum(
+                "fjik,fjk->fji", matrices[:, parents], translations[:, level]
+            )
+    return positions
+
+
+def parse(file: TextIO, table: Dict[str, str], order: Optional[List[str]] = None, dtype=np.float64) -> List[np.ndarray]:
+    """
+    Parses positions of joints from the BVH file, the list contains only one object, same as for other formats.
+    :param table: name of the bone -> name of the BVH joint, or end site, at the end of that bone
+    :param order: names of bones in the order in which they should be returned, defaults to the order of table
+    """
+    skeleton, motion = read(file.read(), dtype)
+    positions = forward_kinematics(skeleton, motion)
+    index = {name: i for i, name in enumerate(skeleton.names)}
+    missing = [table[name] for name in order or table if table[name] not in index]
+    if missing:
+        raise ValueError(f"Joints {', '.join(missing)} are not in the BVH file")
+    return [positions[:, [index[table[name]] for name in order or table]]]
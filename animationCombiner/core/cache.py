@@ -0,0 +1,100 @@
+"""
+Persistent cache of parsed clips. Every entry is a directory of .npy files, so it can be memory-mapped when read.
+Entries are evicted in least recently used order once the size of the cache exceeds its limit.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional
+
+import numpy as np
+
+# Change when the cached arrays are computed differently, so old entries are not used anymore
+VERSION = 2
+CHUNK_SIZE = 1 << 20
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of the file content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ClipCache:
+    """Cache of arrays, which are stored under a key derived from the content of the source file and import settings"""
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        """
+        :param directory: directory in which entries are stored
+        :param max_size: maximal size of all entries in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def key(path: str, *settings) -> str:
+        """Key for the file, settings are all values that change arrays produced from it"""
+        digest = hashlib.sha256(f"{VERSION}:{hash_file(path)}".encode())
+        for setting in settings:
+            digest.update(f":{setting!r}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Returns memory-mapped arrays of the entry, or None if there is no such entry"""
+        entry = os.path.join(self.directory, key)
+        try:
+            names = [name for name in os.listdir(entry) if name.endswith(".npy")]
+            arrays = {name[:-4]: np.load(os.path.join(entry, name), mmap_mode="r") for name in names}
+            # Modification time of the entry is used as its last access time
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        """Stores the arrays under the key and evicts least recently used entries if the cache is too big"""
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=self.directory, prefix=".")
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(temporary, f"{name}.npy"), np.asarray(array))
+            os.replace(temporary, os.path.join(self.directory, key))
+        except OSError:
+            # Either the entry was stored in the meantime or it cannot be stored at all
+            shutil.rmtree(temporary, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """Yields path, size and last access time of all entries, entries removed in the meantime are skipped"""
+        try:
+            with os.scandir(self.directory) as directory:
+                for entry in directory:
+                    if not entry.is_dir() or entry.name.startswith("."):
+                        continue
+                    # Other processes can evict the entry while it is being measured
+                    try:
+                        files = [os.path.join(entry.path, name) for name in os.listdir(entry.path)]
+                        size, mtime = sum(os.path.getsize(file) for file in files), entry.stat().st_mtime
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, size, mtime
+        except FileNotFoundError:
+            return
+
+    def evict(self) -> None:
+        """Removes least recently used entries until all entries fit into the maximal size"""
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        for path, entry_size, _ in entries:
+            if size <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            size -= entry_size
+
+    def clear(self) -> None:
+        """Removes all entries"""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,71 @@
+"""Converts positions of bones into the arrays that are stored in an Animation"""
+import hashlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from animationCombiner.core.rotation import solve_rotations, stabilize
+
+ROTATIONS = "rotations"
+TRANSLATIONS = "translations"
+SKELETON = "skeleton_positions"
+# Rotations are solved in chunks of frames, so temporary arrays stay small even for long clips
+CHUNK_FRAMES = 4096
+
+
+# Arrays which are stored for every clip, in the order in which they are hashed
+STORED = (SKELETON, TRANSLATIONS, ROTATIONS)
+
+
+def content_key(arrays: Dict[str, np.ndarray], order: List[str]) -> str:
+    """
+    Hash of the stored arrays and the order of bones, arrays are hashed as float32, same as they are stored,
+    so identical clips have the same key no matter where they were loaded from.
+    """
+    digest = hashlib.sha256(",".join(order).encode())
+    for key in STORED:
+        if key in arrays:
+            array = np.ascontiguousarray(arrays[key], dtype=np.float32)
+            digest.update(f":{key}:{array.size}:".encode())
+            digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def frame_count(arrays: Dict[str, np.ndarray]) -> int:
+    """Number of frames of the clip, the first frame is the skeleton, rotations are stored for all the others"""
+    return len(arrays[ROTATIONS]) + 1
+
+
+def normalize(positions: np.ndarray, root: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Moves the root into the origin in every frame with a single broadcast subtraction.
+    :return: (frames, bones, 3) normalized positions and (frames, 3) translations of the root
+    """
+    translations = positions[:, root].copy()
+    normalized = np.subtract(positions, translations[:, None], dtype=np.float64)
+    return normalized, translations
+
+
+def has_movement(translations: np.ndarray) -> bool:
+    """True if the root moves from the origin in any frame"""
+    return bool(np.any(translations))
+
+
+def convert(positions: np.ndarray, parents: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calculates skeleton, translations of the root and rotations, translations are left out if there is no movement.
+    :param positions: (frames, bones, 3) positions of bones in the skeleton order
+    :param parents: (bones) index of the parent of every bone, -1 for the root
+    """
+    normalized, translations = normalize(positions, np.argmax(parents < 0))
+
+    arrays = {SKELETON: normalized[0]}
+    if has_movement(translations):
+        arrays[TRANSLATIONS] = translations
+    rotations = np.empty((max(len(normalized) - 1, 0), len(parents), 4))
+    for start in range(0, len(rotations), CHUNK_FRAMES):
+        chunk = normalized[1 + start : 1 + start + CHUNK_FRAMES]
+        rotations[start : start + len(chunk)] = solve_rotations(normalized[0], chunk, parents)
+    # Should fix rotation errors
+    arrays[ROTATIONS] = stabilize(rotations)
+    return arrays
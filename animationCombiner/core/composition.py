@@ -0,0 +1,135 @@
+"""
+Timeline of the composed animation without Blender. Groups are applied one after another, actions in a group at the
+same time, and every action is turned into keyframes of rotations of its bones and of locations of the root.
+animationCombiner.api only translates its property groups into these classes and writes the keyframes into fcurves.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from animationCombiner.core.rotation import multiply
+
+
+@dataclass(frozen=True)
+class Transition:
+    """Frames between the end of an action and the start of the next group"""
+
+    length: int = 1
+    # If True, bones return to the base rotation reset_length frames after the last frame of the action
+    reset: bool = False
+    reset_length: int = 0
+
+    @property
+    def real_length(self) -> int:
+        return self.length - 1 + (self.reset_length if self.reset else 0)
+
+
+@dataclass(frozen=True)
+class Timeline:
+    """Keyframes of a single action, later keyframes replace earlier ones on the same frame"""
+
+    frames: np.ndarray
+    # (keyframes, bones, 4) rotations of the bones that the action animates
+    rotations: np.ndarray
+    location_frames: np.ndarray
+    # (keyframes, 3) locations of the armature
+    locations: np.ndarray
+    # Frame on which the next group can start
+    end: int
+
+
+@dataclass
+class Action:
+    """
+    Single action in a group. Only start, end, slowdown and transition are needed for lengths, arrays are needed only
+    for timelines.
+    """
+
+    start: int
+    end: int
+    slowdown: int = 1
+    transition: Transition = field(default_factory=Transition)
+    enabled: bool = True
+    # (frames, bones, 4) rotations from start to end of the bones that the action animates
+    rotations: Optional[np.ndarray] = None
+    # (bones, 4) rotations of the same bones into the base skeleton
+    base: Optional[np.ndarray] = None
+    # (frames, 3) translations of the root, the first one is where the movement starts, None if it is not used
+    translations: Optional[np.ndarray] = None
+
+    @property
+    def real_length(self) -> int:
+        return (self.end - self.start) * self.slowdown
+
+    @property
+    def length(self) -> int:
+        """Number of frames for which the action lasts, including its transition"""
+        return self.real_length + self.transition.real_length
+
+    def timeline(self, frame_start: int = 0, location: Sequence[float] = (0, 0, 0)) -> Timeline:
+        """
+        Keyframes of the action starting at frame_start, the root moves from the location.
+        Bones are keyed with the base rotation on frame_start, so they do not keep the pose of the previous action
+        if the action has no frames, and once more on the reset frame.
+        """
+        rotations = np.asarray(self.rotations, dtype=np.float64)
+        base = np.asarray(self.base, dtype=np.float64)
+        frames = frame_start + np.arange(len(rotations)) * self.slowdown
+        last_frame = frames[-1] if len(frames) > 0 else frame_start
+        reset_frame = last_frame + self.transition.reset_length
+
+        key_frames = [[frame_start], frames]
+        key_rotations = [base[None], multiply(base, rotations)]
+        if self.transition.reset:
+            key_frames.append([reset_frame])
+            key_rotations.append(base[None])
+            last_frame = reset_frame
+
+        location_frames = np.zeros(0)
+        locations = np.zeros((0, 3))
+        if self.translations is not None and len(rotations) > 0:
+            location_frames = frames
+            locations = (
+                np.asarray(location, dtype=np.float64) + self.translations[: len(rotations)] - self.translations[0]
+            )
+
+        return Timeline(
+            frames=np.concatenate(key_frames).astype(np.float64),
+            rotations=np.concatenate(key_rotations),
+            location_frames=location_frames.astype(np.float64),
+            locations=locations,
+            end=int(last_frame) + self.transition.length,
+        )
+
+
+@dataclass
+class Group:
+    """Actions which are applied at the same time"""
+
+    actions: List[Action] = field(default_factory=list)
+
+    @property
+    def length(self) -> int:
+        return max((action.length for action in self.actions if action.enabled), default=0)
+
+    def timelines(
+        self, frame_start: int = 0, location: Sequence[float] = (0, 0, 0)
+    ) -> Tuple[List[Optional[Timeline]], int, np.ndarray]:
+        """
+        Timelines of all actions, None for disabled ones, the frame on which the next group starts and the location
+        of the armature after the group.
+        """
+        location = np.asarray(location, dtype=np.float64)
+        timelines = []
+        end = frame_start
+        for action in self.actions:
+            if not action.enabled:
+                timelines.append(None)
+                continue
+            timeline = action.timeline(frame_start, location)
+            if len(timeline.locations) > 0:
+                location = timeline.locations[-1]
+            end = max(end, timeline.end)
+            timelines.append(timeline)
+        return timelines, end, location
@@ -0,0 +1,41 @@
+"""
+Conversion between axis conventions. Blender uses Z for height and Y for forward direction, other conventions are
+described by the axes of the file which point up and forward, whether the side axis is mirrored and by unit scale.
+All of that is a single 3x3 matrix, which is applied to the whole clip at once.
+"""
+import numpy as np
+
+from animationCombiner.core.kinematics import AXES
+
+
+def axis_vector(axis: str) -> np.ndarray:
+    """Unit vector of an axis, e.g. Y or -Z"""
+    vector = np.zeros(3)
+    vector[AXES[axis[-1]]] = -1 if axis.startswith("-") else 1
+    return vector
+
+
+def conversion_matrix(up: str = "Z", forward: str = "Y", mirror: bool = False, scale: float = 1.0) -> np.ndarray:
+    """
+    Matrix which converts positions in the convention into the Blender one, it is the identity for default values.
+    :param up: axis of the file that is used for height
+    :param forward: axis of the file that points forward
+    :param mirror: flips the side axis, that changes handedness of the coordinate system, without it the matrix is
+        always a proper rotation. Swap of Y and Z, e.g. "Use Y for height" of older versions, is Y, Z and mirror.
+    :param scale: size of the file unit in Blender units, e.g. 0.001 for millimeters
+    """
+    up_vector, forward_vector = axis_vector(up), axis_vector(forward)
+    if np.any(up_vector * forward_vector):
+        raise ValueError("Up and forward axes have to be different")
+    # Side axis completes a right-handed system, so the axes are only rotated and never reflected
+    side = np.cross(forward_vector, up_vector)
+    if mirror:
+        side = -side
+    return scale * np.array([side, forward_vector, up_vector])
+
+
+def convert(positions: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Converts (..., 3) positions with the matrix, returns the positions unchanged for the identity"""
+    if np.array_equal(matrix, np.eye(3)):
+        return positions
+    return positions @ matrix.T
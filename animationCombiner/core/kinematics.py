@@ -0,0 +1,103 @@
+"""
+Forward kinematics of an Armature, evaluated for all frames at once.
+
+Blender composes pose bones as `parent_pose @ parent_rest^-1 @ rest @ basis`, where rest is the bone matrix in
+Armature space and basis is composed from location, rotation and scale of the pose bone. Tail of the bone is then the
+point in the distance of its length on the Y axis of its pose matrix.
+"""
+from typing import List
+
+import numpy as np
+
+from animationCombiner.core.rotation import EPSILON
+
+AXES = {"X": 0, "Y": 1, "Z": 2}
+
+
+def quaternion_matrices(quaternions: np.ndarray) -> np.ndarray:
+    """Rotation matrices of (w, x, y, z) quaternions, which are normalized first same as in Blender"""
+    norms = np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    w, x, y, z = np.moveaxis(quaternions / np.maximum(norms, EPSILON), -1, 0)
+    return np.stack(
+        [
+            np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+            np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+            np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1),
+        ],
+        axis=-2,
+    )
+
+
+def axis_angle_quaternions(axis_angles: np.ndarray) -> np.ndarray:
+    """Converts (angle, x, y, z) rotations into (w, x, y, z) quaternions"""
+    angles = axis_angles[..., 0]
+    axes = axis_angles[..., 1:]
+    axes = axes / np.maximum(np.linalg.norm(axes, axis=-1, keepdims=True), EPSILON)
+    return np.concatenate([np.cos(angles / 2)[..., None], axes * np.sin(angles / 2)[..., None]], axis=-1)
+
+
+def euler_matrices(angles: np.ndarray, order: str = "XYZ") -> np.ndarray:
+    """Rotation matrices of euler angles (x, y, z), order is the order in which the axes are applied"""
+    result = np.broadcast_to(np.eye(3), angles.shape[:-1] + (3, 3))
+    for axis in order:
+        index = AXES[axis]
+        first, second = (index + 1) % 3, (index + 2) % 3
+        cos, sin = np.cos(angles[..., index]), np.sin(angles[..., index])
+        rotation = np.zeros(angles.shape[:-1] + (3, 3))
+        rotation[..., index, index] = 1
+        rotation[..., first, first] = cos
+        rotation[..., first, second] = -sin
+        rotation[..., second, first] = sin
+        rotation[..., second, second] = cos
+        result = rotation @ result
+    return result
+
+
+def compose(locations: np.ndarray, rotations: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """4x4 matrices from locations, 3x3 rotation matrices and scales"""
+    result = np.zeros(locations.shape[:-1] + (4, 4))
+    result[..., :3, :3] = rotations * scales[..., None, :]
+    result[..., :3, 3] = locations
+    result[..., 3, 3] = 1
+    return result
+
+
+def hierarchy_levels(parents: np.ndarray) -> List[np.ndarray]:
+    """
+    Indices of bones for every depth in the hierarchy except for roots, bones in a level do not depend on each other,
+    so they can be computed at once. Parents do not need to be before their children.
+    """
+    parents = np.asarray(parents)
+    levels = []
+    level = np.flatnonzero(parents < 0)
+    # Every level has at least one bone, so there are never more levels than bones, even if the hierarchy has cycles
+    while len(levels) < len(parents):
+        level = np.flatnonzero(np.isin(parents, level))
+        if len(level) == 0:
+            break
+        levels.append(level)
+    return levels
+
+
+def pose_matrices(rest: np.ndarray, parents: np.ndarray, basis: np.ndarray) -> np.ndarray:
+    """
+    Calculates pose matrices in Armature space for every frame.
+    :param rest: (bones, 4, 4) rest matrices of bones in Armature space
+    :param parents: (bones) index of the parent of every bone, -1 for roots
+    :param basis: (frames, bones, 4, 4) local transformation of every pose bone
+    :return: (frames, bones, 4, 4) matrices
+    """
+    result = np.empty_like(basis)
+    roots = np.flatnonzero(parents < 0)
+    result[:, roots] = rest[roots] @ basis[:, roots]
+    inverse = np.linalg.inv(rest)
+    for level in hierarchy_levels(parents):
+        offsets = inverse[parents[level]] @ rest[level]
+        result[:, level] = result[:, parents[level]] @ offsets @ basis[:, level]
+    return result
+
+
+def pose_tails(rest: np.ndarray, lengths: np.ndarray, parents: np.ndarray, basis: np.ndarray) -> np.ndarray:
+    """Positions of tails of all bones in Armature space as (frames, bones, 3) array, see pose_matrices"""
+    matrices = pose_matrices(rest, parents, basis)
+    return matrices[..., :3, 1] * lengths[:, None] + matrices[..., :3, 3]
@@ -0,0 +1,207 @@
+"""
+Bulk reader and writer for MESSIF .data files, every object is a single (frames, bones, 3) array.
+Files on disk are indexed first, so only objects that are accessed are parsed.
+"""
+import json
+import os
+import re
+from collections.abc import Sequence
+from typing import List, NamedTuple, TextIO, Union
+
+import numpy as np
+
+from animationCombiner.core.text import parse_numbers
+
+OBJECT_KEY = re.compile(rb"^#objectKey", re.MULTILINE)
+# Index of a file is stored next to it with this suffix
+INDEX_SUFFIX = ".index.json"
+
+_TO_WHITESPACE = str.maketrans(",;", "  ")
+# Number of frames formatted and written at once
+CHUNK_FRAMES = 4096
+
+
+class ObjectEntry(NamedTuple):
+    """Position of a single object in the file"""
+
+    key: str
+    # Byte offset and size of rows of the object
+    offset: int
+    size: int
+    frames: int
+    # Line number of the first row
+    line: int
+
+
+def index(data: bytes) -> List[ObjectEntry]:
+    """Finds all objects in the content of the file in one pass"""
+    entries = []
+    key, start, line = "", 0, 1
+    for match in [*OBJECT_KEY.finditer(data), None]:
+        end = match.start() if match else len(data)
+        if end > start:
+            frames = data.count(b"\n", start, end) + (0 if data[end - 1 : end] == b"\n" else 1)
+            entries.append(ObjectEntry(key, start, end - start, frames, line))
+            line += frames
+        if match is None:
+            break
+
+        # Skip the header and the type line
+        header_end = data.find(b"\n", end)
+        header = data[end : header_end if header_end >= 0 else len(data)].decode().split(maxsplit=2)
+        key = header[2] if len(header) > 2 else ""
+        start = end
+        for _ in range(2):
+            newline = data.find(b"\n", start)
+            start = len(data) if newline < 0 else newline + 1
+            line += 1
+    return entries
+
+
+def load_index(path: str) -> List[ObjectEntry]:
+    """Index of the file, reused from its sidecar file if the file did not change since it was saved"""
+    stat = os.stat(path)
+    sidecar = path + INDEX_SUFFIX
+    try:
+        with open(sidecar, "r") as file:
+            saved = json.load(file)
+        if saved["size"] == stat.st_size and saved["mtime"] == stat.st_mtime_ns:
+            return [ObjectEntry(*entry) for entry in saved["objects"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    with open(path, "rb") as file:
+        entries = index(file.read())
+    try:
+        with open(sidecar, "w") as file:
+            json.dump({"size": stat.st_size, "mtime": stat.st_mtime_ns, "objects": entries}, file)
+    except OSError:
+        # Index is only an optimization, e.g. directories with datasets can be read-only
+        pass
+    return entries
+
+
+def validate_row(row: str, bones: int, line_number: int) -> None:
+    """Checks that the row contains one 3D vector for every bone"""
+    vectors = row.split(";")
+    assert len(vectors) == bones, f"Incompatible skeleton at line {line_number}"
+    for vector in vectors:
+        numbers = vector.split(",")
+        assert len(numbers) == 3, f"Incorrect vector dimensions at line {line_number}"
+        np.asarray(numbers, dtype=np.double)
+
+
+def parse_block(block: str, bones: int, first_line: int = 1, dtype=np.float64) -> np.ndarray:
+    """Parses rows of a single object into (frames, bones, 3) array in one pass"""
+    if not block.endswith("\n"):
+        block += "\n"
+    frames = block.count("\n")
+
+    # Every row needs to have one vector per bone, where vectors end with ";" (or newline) and contain 2 commas
+    raw = np.frombuffer(block.encode(), dtype=np.uint8)
+    ends = np.flatnonzero((raw == ord(";")) | (raw == ord("\n")))
+    commas = np.diff(np.searchsorted(np.flatnonzero(raw == ord(",")), ends), prepend=0)
+    newlines = raw[ends] == ord("\n")
+    vectors = np.diff(np.flatnonzero(newlines), prepend=-1)
+    invalid_rows = np.concatenate([np.flatnonzero(vectors != bones), (np.cumsum(newlines) - newlines)[commas != 2]])
+    if len(invalid_rows) > 0:
+        _raise_for_rows(block, bones, first_line, int(invalid_rows.min()))
+
+    try:
+        data = parse_numbers(block.translate(_TO_WHITESPACE), dtype)
+    except ValueError:
+        data = None
+    if data is None or data.size != frames * bones * 3:
+        _raise_for_rows(block, bones, first_line)
+    return data.reshape((frames, bones, 3))
+
+
+def _raise_for_rows(block: str, bones: int, first_line: int, start: int = 0):
+    """Finds the first malformed row, starting with row `start`, and raises error with its line number"""
+    rows = block.split("\n")[:-1]
+    for i in range(start, len(rows)):
+        validate_row(rows[i], bones, first_line + i)
+    raise AssertionError(f"Unable to parse object starting at line {first_line}")
+
+
+class ObjectFile(Sequence):
+    """Objects of a file on disk, which are parsed only when they are accessed either by position or by key"""
+
+    def __init__(self, path: str, bones: int, dtype=np.float64) -> None:
+        self.path = path
+        self.bones = bones
+        self.dtype = dtype
+        self.entries = load_index(path)
+        self.positions = {entry.key: i for i, entry in reversed(list(enumerate(self.entries)))}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, item: Union[int, str, slice]):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        if isinstance(item, str):
+            item = self.positions[item]
+        entry = self.entries[item]
+        with open(self.path, "rb") as file:
+            file.seek(entry.offset)
+            block = file.read(entry.size).decode()
+        return parse_block(block, self.bones, entry.line, self.dtype)
+
+    def keys(self) -> List[str]:
+        return [entry.key for entry in self.entries]
+
+
+class ParsedObjects(Sequence):
+    """Objects that were already parsed, accessible either by position or by key same as in ObjectFile"""
+
+    def __init__(self, objects: List[np.ndarray], keys: List[str]) -> None:
+        self.objects = objects
+        self._keys = keys
+        self.positions = {key: i for i, key in reversed(list(enumerate(keys)))}
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __getitem__(self, item: Union[int, str, slice]):
+        if isinstance(item, str):
+            item = self.positions[item]
+        return self.objects[item]
+
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+
+def parse(file: TextIO, bones: int, dtype=np.float64) -> Sequence:
+    """
+    Parses all objects in the file into (frames, bones, 3) arrays, they can be accessed by position or by key.
+    Objects of files on disk are parsed lazily, see ObjectFile, other files are parsed all at once.
+    """
+    path = getattr(file, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return ObjectFile(path, bones, dtype)
+    data = file.read().encode()
+    entries = index(data)
+    return ParsedObjects(
+        [
+            parse_block(data[entry.offset : entry.offset + entry.size].decode(), bones, entry.line, dtype)
+            for entry in entries
+        ],
+        [entry.key for entry in entries],
+    )
+
+
+def format_rows(positions: np.ndarray, precision: int = 6) -> str:
+    """Formats (frames, bones, 3) array into rows of an object, all numbers are written with fixed precision"""
+    frames, bones, _ = positions.shape
+    number = f"%.{precision}f"
+    row = "; ".join([", ".join([number] * 3)] * bones) + "\n"
+    return (row * frames) % tuple(positions.ravel().tolist())
+
+
+def write(file: TextIO, key: str, positions: np.ndarray, precision: int = 6) -> None:
+    """Writes single object with the header, rows are formatted and written in chunks of CHUNK_FRAMES"""
+    file.write(f"#objectKey messif.objects.keys.AbstractObjectKey {key}\n")
+    file.write(f"{len(positions)};mcdr.objects.ObjectMocapPose\n")
+    for start in range(0, len(positions), CHUNK_FRAMES):
+        file.write(format_rows(positions[start : start + CHUNK_FRAMES], precision))
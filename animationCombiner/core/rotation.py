@@ -0,0 +1,90 @@
+"""
+Calculates local bone rotations of an Armature from only positions of the bone tails.
+
+Every bone is created with zero roll, so its orientation is the shortest arc (swing) rotation from the Y axis to the
+direction of the bone. Blender composes pose bones as `parent_pose @ parent_rest^-1 @ rest @ basis`, so the rotation
+which turns the rest pose into a pose with the same orientations as an Armature edited into the new positions is:
+
+    basis = rest^-1 @ parent_rest @ parent_pose^-1 @ pose
+
+Everything is computed with quaternions (w, x, y, z) for all frames and bones at once.
+"""
+import numpy as np
+
+EPSILON = 1e-9
+# Head of the root bone is placed above its tail, see animationCombiner.utils.create_bones
+ROOT_OFFSET = np.array((0.0, 0.1, 0.0))
+IDENTITY = np.array((1.0, 0.0, 0.0, 0.0))
+
+
+def multiply(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Hamilton product of two arrays of quaternions"""
+    w1, x1, y1, z1 = np.moveaxis(first, -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(second, -1, 0)
+    return np.stack(
+        [
+            w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+            w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+            w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+            w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+        ],
+        axis=-1,
+    )
+
+
+def conjugate(quaternions: np.ndarray) -> np.ndarray:
+    """Inverse of unit quaternions"""
+    return quaternions * np.array((1.0, -1.0, -1.0, -1.0))
+
+
+def swing(directions: np.ndarray) -> np.ndarray:
+    """Shortest arc rotations from the Y axis to the directions"""
+    lengths = np.linalg.norm(directions, axis=-1, keepdims=True)
+    x, y, z = np.moveaxis(directions / np.maximum(lengths, EPSILON), -1, 0)
+    quaternions = np.stack([1 + y, z, np.zeros_like(y), -x], axis=-1)
+    norms = np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    quaternions /= np.maximum(norms, EPSILON)
+    # Directions opposite to the Y axis, Blender rotates those around Z axis
+    quaternions[norms[..., 0] < EPSILON] = (0.0, 0.0, 0.0, 1.0)
+    return quaternions
+
+
+def bone_directions(positions: np.ndarray, parents: np.ndarray, root_head: np.ndarray) -> np.ndarray:
+    """Directions from head to tail of every bone, where head of each bone is the tail of its parent"""
+    heads = positions[..., np.maximum(parents, 0), :]
+    heads[..., parents < 0, :] = root_head
+    return positions - heads
+
+
+def parent_rotations(rotations: np.ndarray, parents: np.ndarray) -> np.ndarray:
+    """Rotations of parents of every bone, root has identity"""
+    result = rotations[..., np.maximum(parents, 0), :]
+    result[..., parents < 0, :] = IDENTITY
+    return result
+
+
+def solve_rotations(rest: np.ndarray, positions: np.ndarray, parents: np.ndarray) -> np.ndarray:
+    """
+    Calculates local rotations of all bones that transform skeleton from the rest pose into every pose.
+    :param rest: (bones, 3) positions of bone tails in the rest pose
+    :param positions: (frames, bones, 3) positions of bone tails in every frame
+    :param parents: (bones) index of the parent of every bone, -1 for the root
+    :return: (frames, bones, 4) quaternions, with non-negative w
+    """
+    root_head = rest[np.argmax(parents < 0)] + ROOT_OFFSET
+    rest_swing = swing(bone_directions(rest, parents, root_head))
+    pose_swing = swing(bone_directions(positions, parents, root_head))
+
+    rotations = multiply(
+        multiply(conjugate(rest_swing), parent_rotations(rest_swing, parents)),
+        multiply(conjugate(parent_rotations(pose_swing, parents)), pose_swing),
+    )
+    rotations *= np.where(rotations[..., :1] < 0, -1.0, 1.0)
+    return rotations
+
+
+def stabilize(rotations: np.ndarray) -> np.ndarray:
+    """Flips quaternions in-place, so consecutive frames do not rotate the long way around, and returns them"""
+    flips = np.sum(rotations[1:] * rotations[:-1], axis=-1) < 0
+    rotations[1:] *= np.where(np.cumsum(flips, axis=0) % 2 == 1, -1.0, 1.0)[..., None]
+    return rotations
@@ -0,0 +1,15 @@
+"""Helpers for parsing text formats"""
+import warnings
+
+import numpy as np
+
+
+def parse_numbers(text: str, dtype=np.float64) -> np.ndarray:
+    """Parses whitespace separated numbers in one pass"""
+    try:
+        with warnings.catch_warnings():
+            # Older NumPy versions only warn about unparsable data and return truncated array
+            warnings.simplefilter("error", DeprecationWarning)
+            return np.fromstring(text, dtype=dtype, sep=" ")
+    except (ValueError, DeprecationWarning) as error:
+        raise ValueError("File contains values that are not numbers") from error
@@ -0,0 +1,238 @@
+"""
+Composes animations from a spec without UI, see animationCombiner.cli for the format of the spec.
+Actions are created, applied and exported by the same code as the importers, ApplyOperator and exporters use.
+"""
+import json
+import os
+import time
+from functools import partial
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import bpy
+import numpy as np
+
+from animationCombiner.api.library import purge_clips
+from animationCombiner.api.skeletons import HDMSkeleton
+from animationCombiner.core import amc, bvh, coordinates, messif
+from animationCombiner.core.batch import ClipJob, load_clips
+from animationCombiner.operators.apply import apply_actions
+from animationCombiner.parsers.amc.importer import find_asf, load_skeleton
+from animationCombiner.parsers.base.exporter import BaseExportOperator
+from animationCombiner.parsers.base.importer import create_action
+from animationCombiner.parsers.bvh import HDM_NAMES
+from animationCombiner.parsers.error import ParserError
+from animationCombiner.parsers.messif import NAMES
+from animationCombiner.parsers.messif.exporter import write_animation
+from animationCombiner.utils import complete_update, create_armature
+
+# Errors of a single file or composition, they are reported and the rest of the spec continues
+ERRORS = (ParserError, ValueError, AssertionError, KeyError, OSError, RuntimeError)
+
+
+class EnabledPart(NamedTuple):
+    """Body part with the same fields as EnabledPartsCollection, for create_action and prepare_animation"""
+
+    name: str
+    uuid: str
+    checked: bool
+
+
+def read_spec(path: str) -> dict:
+    """Reads JSON or TOML spec, TOML needs Python 3.11+"""
+    with open(path, "rb") as file:
+        if path.endswith(".toml"):
+            import tomllib  # pylint: disable=import-outside-toplevel
+
+            return tomllib.load(file)
+        return json.load(file)
+
+
+def compositions(spec: dict) -> List[dict]:
+    return spec["compositions"] if "compositions" in spec else [spec]
+
+
+def clip_key(action: dict, composition: dict, base: str) -> tuple:
+    """Path, ASF path, name table and coordinates, everything that changes how the file is loaded"""
+    return (
+        os.path.join(base, action["file"]),
+        os.path.join(base, action["asf"]) if action.get("asf") else None,
+        json.dumps(action.get("name_table"), sort_keys=True),
+        json.dumps(composition.get("coordinates"), sort_keys=True),
+    )
+
+
+def file_parser(path: str, asf: Optional[str], name_table: Optional[dict]):
+    """Parser of the file by its extension, all of them return bones in NAMES order"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".data":
+        return partial(messif.parse, bones=len(NAMES))
+    if extension == ".amc":
+        return partial(amc.parse, skeleton=load_skeleton(asf or find_asf(path)), order=NAMES)
+    if extension == ".bvh":
+        return partial(bvh.parse, table={**HDM_NAMES, **(name_table or {})}, order=NAMES)
+    raise ValueError(f"Unsupported file {path}")
+
+
+def conversion(settings: Optional[dict]) -> np.ndarray:
+    settings = settings or {}
+    return coordinates.conversion_matrix(
+        settings.get("up", "Z"), settings.get("forward", "Y"), settings.get("mirror", False), settings.get("scale", 1.0)
+    )
+
+
+def load_files(specs: List[dict], base: str, workers: Optional[int]) -> Tuple[Dict[tuple, dict], Dict[tuple, str]]:
+    """Parses every distinct file with its settings once, returns arrays and errors of files by clip_key"""
+    skeleton = HDMSkeleton()
+    jobs, errors = {}, {}
+    for composition in specs:
+        for group in composition["groups"]:
+            for action in group["actions"]:
+                key = clip_key(action, composition, base)
+                if key in jobs or key in errors:
+                    continue
+                try:
+                    jobs[key] = ClipJob(
+                        path=key[0],
+                        parse=file_parser(key[0], key[1], action.get("name_table")),
+                        permutation=skeleton.permutation(NAMES),
+                        parents=skeleton.parents,
+                        matrix=conversion(composition.get("coordinates")),
+                    )
+                except ERRORS as error:
+                    errors[key] = str(getattr(error, "message", error))
+
+    clips = {}
+    # Jobs are yielded in the same order, they cannot be used as keys as they contain arrays
+    for key, (_, arrays, error) in zip(jobs, load_clips(jobs.values(), max_workers=workers)):
+        if error is not None:
+            errors[key] = str(getattr(error, "message", error))
+        else:
+            clips[key] = arrays
+    return clips, errors
+
+
+def enabled_parts(armature, checked: Dict[str, bool]) -> List[EnabledPart]:
+    """All body parts of the Armature, parts that are not in checked are enabled"""
+    return [
+        EnabledPart(part.name, part.get_uuid(), checked.get(part.name, True))
+        for part in armature.get_body_parts().body_parts
+    ]
+
+
+def add_action(armature, group, path: str, arrays: Dict[str, np.ndarray], spec: dict) -> None:
+    """Adds the action and assigns its settings from the spec directly, so no update callbacks are called"""
+    action = create_action(group, path, arrays, HDMSkeleton(), enabled_parts(armature, spec.get("body_parts", {})))
+    action.name = spec.get("name", action.name)
+    action["use_skeleton"] = spec.get("use_skeleton", False)
+    action["use_movement"] = spec.get("use_movement", False) and action.animation.has_movement
+    action["enabled"] = spec.get("enabled", True)
+    length_group = action.length_group
+    length_group["start"] = min(spec.get("start", 0), length_group.original_length)
+    length_group["end"] = min(spec.get("end", length_group.original_length), length_group.original_length)
+    length_group["slowdown"] = spec.get("slowdown", 1)
+    transition = spec.get("transition", {})
+    action.transition["length"] = transition.get("length", 1)
+    action.transition["reset"] = transition.get("reset", False)
+    action.transition["reset_length"] = transition.get("reset_length", 0)
+
+
+def export(armature, path: str, settings: dict) -> None:
+    """Exports the applied Armature as MESSIF, same as MessifExporter"""
+    parts = enabled_parts(armature.data, {name: False for name in settings.get("disabled_parts", ())})
+    matrix = np.linalg.inv(conversion(settings.get("coordinates")))
+    animation, disabled_bones = BaseExportOperator.prepare_animation(armature, parts, matrix)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        write_animation(
+            file,
+            animation,
+            disabled_bones,
+            settings.get("key", os.path.splitext(os.path.basename(path))[0]),
+            settings.get("binary_string", False),
+            settings.get("precision", 6),
+        )
+
+
+def compose(composition: dict, clips: Dict[tuple, dict], base: str) -> Dict[str, float]:
+    """Creates Armature with all groups and actions, applies them and exports the result, returns timings"""
+    timings = {}
+    start = time.perf_counter()
+    if bpy.context.object is not None and bpy.context.object.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
+    armature = create_armature(composition.get("name", "Armature"))
+    bpy.context.view_layer.objects.active = armature
+    try:
+        for index, group_spec in enumerate(composition["groups"]):
+            group = armature.data.groups.add()
+            group.name = group_spec.get("name", f"Group {index + 1}")
+            for action_spec in group_spec["actions"]:
+                key = clip_key(action_spec, composition, base)
+                add_action(armature.data, group, key[0], clips[key], action_spec)
+        complete_update()
+        timings["actions"] = time.perf_counter() - start
+
+        errors = {error.error for group in armature.data.groups for error in group.errors}
+        if errors:
+            raise ValueError(f"Composition is not valid: {', '.join(sorted(errors))}")
+
+        start = time.perf_counter()
+        apply_actions(armature)
+        timings["apply"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        settings = {"coordinates": composition.get("coordinates"), **composition.get("export", {})}
+        export(armature, os.path.join(base, composition["output"]), settings)
+        timings["export"] = time.perf_counter() - start
+    finally:
+        remove_armature(armature)
+    return timings
+
+
+def remove_armature(armature) -> None:
+    """Removes the Armature with its Action and releases its clips"""
+    for group in armature.data.groups:
+        for action in group.actions:
+            action.animation.release()
+    action = armature.animation_data.action if armature.animation_data else None
+    data = armature.data
+    bpy.data.objects.remove(armature)
+    bpy.data.armatures.remove(data)
+    if action is not None:
+        bpy.data.actions.remove(action)
+
+
+def run(spec_path: str, workers: Optional[int] = None) -> int:
+    """Composes all compositions in the spec, failed ones are reported and skipped, returns the exit code"""
+    base = os.path.dirname(os.path.abspath(spec_path))
+    specs = compositions(read_spec(spec_path))
+
+    start = time.perf_counter()
+    clips, errors = load_files(specs, base, workers)
+    for key, error in errors.items():
+        print(f"{key[0]}: failed, {error}")
+    print(f"Loaded {len(clips)} files in {time.perf_counter() - start:.2f} s")
+
+    failed = 0
+    for composition in specs:
+        name = composition.get("name", composition["output"])
+        missing = {
+            key[0]
+            for group in composition["groups"]
+            for key in (clip_key(action, composition, base) for action in group["actions"])
+            if key not in clips
+        }
+        if missing:
+            failed += 1
+            print(f"{name}: failed, files could not be loaded: {', '.join(sorted(missing))}")
+            continue
+        try:
+            timings = compose(composition, clips, base)
+        except ERRORS as error:
+            failed += 1
+            print(f"{name}: failed, {getattr(error, 'message', error)}")
+            continue
+        print(f"{name}: " + ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in timings.items()))
+
+    purge_clips()
+    print(f"Composed {len(specs) - failed} of {len(specs)} compositions in {time.perf_counter() - start:.2f} s")
+    return 1 if failed else 0
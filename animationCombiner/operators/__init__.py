@@ -4,7 +4,7 @@ import bpy
 from bpy.props import StringProperty
 from bpy.types import Context
 
-from animationCombiner.utils import copy, on_actions_update
+from animationCombiner.utils import copy, on_actions_update, complete_update
 
 
 class Empty(bpy.types.Operator):
@@ -64,12 +64,42 @@ class MoveActionToGroupOperator(bpy.types.Operator):
         new_action = new_group.actions.add()
         copy(action, new_action)
 
+        group.dirty = True
+        new_group.dirty = True
+        action.animation.release()
         group.actions.remove(group.active)
         group.active = min(max(0, group.active - 1), len(group.actions) - 1)
         on_actions_update()
         return {"FINISHED"}
 
 
+class DuplicateActionOperator(bpy.types.Operator):
+    """Duplicates Action in its Group, the copy is placed right after it"""
+
+    bl_idname = "ac.duplicate_action"
+    bl_label = "Duplicate action"
+
+    def execute(self, context: Context) -> typing.Set[str]:
+        obj = context.object.data
+        if not obj.groups or not obj.groups[obj.active].actions:
+            return {"CANCELLED"}
+
+        group = obj.groups[obj.active]
+        action = group.actions[group.active]
+        new_action = group.actions.add()
+        copy(action, new_action)
+        new_action.name = f"{action.name} (copy)"
+        # There can be only one skeleton, properties are assigned directly, so no update callbacks are called
+        new_action["use_skeleton"] = False
+        new_action["dirty"] = True
+
+        group.actions.move(len(group.actions) - 1, group.active + 1)
+        group.active += 1
+        group.dirty = True
+        complete_update()
+        return {"FINISHED"}
+
+
 class SelectGroupOperator(bpy.types.Operator):
     """Selects group to which the action should move"""
 
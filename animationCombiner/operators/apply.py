@@ -1,10 +1,11 @@
 import bpy
 from mathutils import Vector
 
-from animationCombiner.animation import process_animation
+from animationCombiner.animation import Keyframes, composition_action, insert_timeline
 from animationCombiner.api.skeletons import HDMSkeleton
-from animationCombiner.utils import create_bones
-from animationCombiner.utils.rotation import create_rotation_armatures, calculate_frame
+from animationCombiner.core import composition
+from animationCombiner.utils import create_bones, flush_updates
+from animationCombiner.utils.rotation import FRAME_CACHE
 
 
 def skeleton_diff(base_skeleton, skeleton):
@@ -12,42 +13,59 @@ def skeleton_diff(base_skeleton, skeleton):
     return [base.coords.rotation_difference(pos.coords) for base, pos in zip(base_skeleton, skeleton)]
 
 
-class ApplyOperator(bpy.types.Operator):
-    """Applies the actions to the Armature."""
+def apply_actions(armature) -> None:
+    """
+    Applies the actions to the Armature, which needs to be the active object, raises ValueError if a clip is missing.
+    * Delete armature bones
+    * TODO: Rescale all other skeletons (=set bone length to specific lengths)
+    * Create new armature bones based on chosen skeleton
+     For each action
+        * Apply rotation
+        * TODO: Apply translation to root
+        * Calculate transition
 
-    bl_idname = "ac.process"
-    bl_label = "Applies all actions to the armature"
+    If the Armature was already applied, only groups that changed since then are baked again and keyframes of the
+    other groups are just moved to their new frames.
+    """
+    flush_updates()
+    bpy.context.scene.frame_set(bpy.context.scene.frame_start)
+    armature_data = armature.data
 
-    def execute(self, context):
-        """
-        * Delete armature bones
-        * TODO: Rescale all other skeletons (=set bone length to specific lengths)
-        * Create new armature bones based on chosen skeleton
-         For each action
-            * Apply rotation
-            * TODO: Apply translation to root
-            * Calculate transition
-        """
-
-        bpy.context.scene.frame_set(bpy.context.scene.frame_start)
-        armature = bpy.context.view_layer.objects.active
-        armature_data = armature.data
+    if len(armature_data.groups) == 0:
         armature.animation_data_clear()
+        return
 
-        if len(armature_data.groups) == 0:
-            return {"FINISHED"}
+    missing = [
+        action.name
+        for group in armature_data.groups
+        for action in group.actions
+        if (action.enabled or action.use_skeleton) and action.animation.is_missing
+    ]
+    if missing:
+        raise ValueError(f"Clips of actions are missing, import them again: {', '.join(missing)}")
 
-        # Select skeleton from poses
-        pose = None
-        translation = None
-        for group in armature_data.groups:
-            for action in group.actions:
-                if action.use_skeleton:
-                    animation = action.animation
-                    pose = animation.initial_pose()
-                    translation = animation.movement[0].translation if animation.has_movement else Vector((0, 0, 0))
+    # Select skeleton from poses
+    pose = None
+    translation = None
+    for group in armature_data.groups:
+        for action in group.actions:
+            if action.use_skeleton:
+                animation = action.animation
+                pose = animation.initial_pose()
+                translation = Vector(animation.translations()[0]) if animation.has_movement else Vector((0, 0, 0))
+
+    skeleton = HDMSkeleton()
 
-        skeleton = HDMSkeleton()
+    incremental = (
+        armature.animation_data is not None
+        and armature.animation_data.action is not None
+        and not all(group.needs_apply for group in armature_data.groups)
+    )
+    if incremental:
+        previous = Keyframes.read(armature)
+    else:
+        previous = Keyframes()
+        armature.animation_data_clear()
 
         # Recreate all Bones
         order = skeleton.order()
@@ -57,25 +75,62 @@ class ApplyOperator(bpy.types.Operator):
             if bone is not None:
                 armature_data.edit_bones.remove(bone)
 
-        armature.location = translation
         create_bones(armature_data, skeleton, pose)
         bpy.ops.object.mode_set(mode="POSE", toggle=False)
         armature.pose.bones["root"].location = Vector((0, 0, 0))
+    armature.location = translation
+
+    keyframes = Keyframes()
+    # Old frame ranges of groups which are kept, by how many frames they move and how much their location changes
+    ranges, offsets, location_offsets = [], [], []
+    starting = 0
+    for group in armature_data.groups:
+        location = Vector(armature.location)
+        if group.needs_apply or not incremental:
+            actions, names = [], []
+            for action in group.actions:
+                if not action.enabled:
+                    continue
+                diff = FRAME_CACHE.calculate_frame(pose, action.animation.initial_pose(), skeleton)
+                timing, bones = composition_action(action, diff, skeleton)
+                actions.append(timing)
+                names.append(bones)
+            timelines, ending, end_location = composition.Group(actions).timelines(starting, location)
+            for bones, timeline in zip(names, timelines):
+                insert_timeline(armature, bones, timeline, keyframes)
+            armature.location = Vector(end_location)
+        else:
+            ending = starting + group.applied_end - group.applied_start
+            ranges.append((group.applied_start, group.applied_end))
+            offsets.append(starting - group.applied_start)
+            location_offsets.append(location - Vector(group.applied_location))
+            armature.location = location + Vector(group.applied_movement)
 
-        with create_rotation_armatures(pose, skeleton) as armatures:
-            armature_a, armature_b = armatures
-            parts_dict = {part.uuid: {bone.bone for bone in part.bones} for part in armature_data.body_parts.body_parts}
-            starting = 0
-            for group in armature_data.groups:
-                ending = starting
-                for action in group.actions:
-                    if not action.enabled:
-                        continue
-                    diff = calculate_frame(armature_a, armature_b, action.animation.initial_pose())
-                    ending = max(
-                        ending, process_animation(armature, action, diff, skeleton, parts_dict, frame_start=starting)
-                    )
-                starting = ending
-            bpy.context.scene.frame_end = starting
-        armature_data.is_applied = True
+        group.applied_start = starting
+        group.applied_end = ending
+        group.applied_location = location
+        group.applied_movement = armature.location - location
+        group.dirty = False
+        for action in group.actions:
+            action.dirty = False
+        starting = ending
+
+    keyframes.update(previous.relocate(ranges, offsets, {"location": location_offsets}))
+    keyframes.write(armature)
+    bpy.context.scene.frame_end = starting
+    armature_data.is_applied = True
+
+
+class ApplyOperator(bpy.types.Operator):
+    """Applies the actions to the Armature."""
+
+    bl_idname = "ac.process"
+    bl_label = "Applies all actions to the armature"
+
+    def execute(self, context):
+        try:
+            apply_actions(bpy.context.view_layer.objects.active)
+        except ValueError as err:
+            self.report({"ERROR"}, str(err))
+            return {"CANCELLED"}
         return {"FINISHED"}
@@ -0,0 +1 @@
+"""ASF/AMC motion capture format, e.g. from CMU or HDM05 datasets"""
@@ -0,0 +1,87 @@
+import glob
+import os
+from functools import lru_cache, partial
+from typing import List
+
+import bpy
+from bpy.props import StringProperty
+from bpy.types import Context, Operator
+
+from animationCombiner.api.model import RawAnimation
+from animationCombiner.api.skeletons import Skeleton
+from animationCombiner.core import amc
+from animationCombiner.core.amc import AsfSkeleton
+from animationCombiner.parsers import importers
+from animationCombiner.parsers.amc_parser import parse_asf
+from animationCombiner.parsers.base.importer import BaseImportOperator, BatchImportMixin
+from animationCombiner.parsers.error import ParserError
+from animationCombiner.parsers.messif import NAMES
+
+
+def find_asf(path: str) -> str:
+    """Finds ASF file for the AMC file, CMU names them by the subject, e.g. 01.asf for 01_02.amc"""
+    directory, name = os.path.split(path)
+    candidates = sorted(glob.glob(os.path.join(directory, "*.asf")))
+    for candidate in candidates:
+        if name.startswith(os.path.splitext(os.path.basename(candidate))[0]):
+            return candidate
+    if len(candidates) == 1:
+        return candidates[0]
+    raise ParserError(f"Unable to find ASF skeleton for {name}, select it in the import settings")
+
+
+def load_skeleton(path: str) -> AsfSkeleton:
+    """Parses ASF file into arrays, the skeleton is reused until the file is modified"""
+    path = os.path.abspath(path)
+    return _load_skeleton(path, os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _load_skeleton(path: str, _mtime: int) -> AsfSkeleton:
+    with open(path, "r") as file:
+        return AsfSkeleton.from_joints(parse_asf(file))
+
+
+@importers.register(name="ASF/AMC (.amc)")
+class AMCLoader(BaseImportOperator, Operator):
+    bl_idname = "ac.amc_import_file"
+
+    # ImportHelper mixin class uses this
+    filename_ext = ".amc"
+
+    filter_glob: StringProperty(
+        default="*.amc",
+        options={"HIDDEN"},
+        maxlen=255,  # Max internal buffer length, longer would be clamped.
+    )
+    asf_path: StringProperty(
+        name="Skeleton",
+        subtype="FILE_PATH",
+        description="ASF file with the skeleton. If empty, ASF file from the same directory is used",
+    )
+
+    names = NAMES
+
+    def skeleton_path(self, path: str) -> str:
+        """Path to the ASF file for the AMC file in the path"""
+        return bpy.path.abspath(self.asf_path) if self.asf_path else find_asf(path)
+
+    def file_parser(self, path: str):
+        return partial(amc.parse, skeleton=load_skeleton(self.skeleton_path(path)), order=NAMES)
+
+    def cache_settings(self, path: str, skeleton: Skeleton) -> tuple:
+        asf_path = self.skeleton_path(path)
+        return *super().cache_settings(path, skeleton), asf_path, os.path.getmtime(asf_path)
+
+    def load_animations(self, file) -> List[RawAnimation]:
+        skeleton = load_skeleton(self.skeleton_path(file.name))
+        return [RawAnimation(positions, NAMES) for positions in amc.parse(file, skeleton, NAMES)]
+
+    def draw(self, context: Context) -> None:
+        self.layout.prop(data=self, property="asf_path")
+        super().draw(context)
+
+
+@importers.register(name="ASF/AMC (.amc), multiple files")
+class AMCBatchLoader(BatchImportMixin, AMCLoader, Operator):
+    bl_idname = "ac.amc_batch_import"
@@ -39,6 +39,7 @@ class Joint:
         axis = np.deg2rad(axis)
         self.C = euler2mat(*axis)
         self.Cinv = np.linalg.inv(self.C)
+        self.dof = dof
         self.limits = np.zeros([3, 2])
         for lm, nm in zip(limits, dof):
             if nm == "rx":
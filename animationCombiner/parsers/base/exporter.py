@@ -1,27 +1,30 @@
-from typing import Collection, Set
+from typing import Collection, Iterable, Set, Tuple
 
 import bpy
+import numpy as np
 from bpy.props import CollectionProperty, BoolProperty
 from bpy.types import Operator, Context, Event
 from bpy_extras.io_utils import ExportHelper
-from mathutils import Vector
 
 from animationCombiner.api.actions import EnabledPartsCollection
 from animationCombiner.api.body_parts import BodyPartsConfiguration
-from animationCombiner.api.model import RawAnimation, Pose
-from animationCombiner.utils.coordinates import invert_yz
+from animationCombiner.api.model import RawAnimation
+from animationCombiner.api.skeletons import HDMSkeleton
+from animationCombiner.utils.coordinates import CoordinatesMixin, convert_coordinates
+from animationCombiner.utils.kinematics import sample_tails
 
 
-class BaseExportOperator(Operator, ExportHelper):
+class BaseExportOperator(CoordinatesMixin, Operator, ExportHelper):
     """Exports the animation data. Need to be processed first"""
 
     bl_idname = "ac.base_export_file"
     bl_label = "Export"
 
-    invert_yz: BoolProperty(
-        name="Use Y for height",
-        description="In Blender Z coordinate is height, set to true if the input file uses Y for height. It does not "
-        "affect functionality, it just improves how it is displayed in Blender.",
+    sample_fcurves: BoolProperty(
+        name="Sample F-Curves",
+        default=True,
+        description="Evaluates bone positions directly from the Action instead of setting the scene to every frame. "
+        "It is much faster, but drivers, constraints and NLA are ignored.",
     )
     body_parts: CollectionProperty(type=EnabledPartsCollection)
 
@@ -37,42 +40,58 @@ class BaseExportOperator(Operator, ExportHelper):
         return super().invoke(context, event)
 
     def execute(self, context):
+        try:
+            matrix = np.linalg.inv(self.coordinate_matrix())
+        except ValueError as err:
+            self.report({"WARNING"}, str(err))
+            return {"CANCELLED"}
         armature = bpy.context.view_layer.objects.active
+        data, disabled_bones = self.prepare_animation(armature, self.body_parts, matrix, self.sample_fcurves)
 
-        config = armature.data.body_parts
-        disabled_parts = {part.uuid for part in self.body_parts if not part.checked}
+        with open(self.filepath, "w", encoding="utf-8") as file:
+            self.export_animation(data, disabled_bones, file)
+        return {"FINISHED"}
 
-        disabled_bones = set()
-        for part in config.body_parts:
-            if part.uuid in disabled_parts:
-                for bone in part.bones:
-                    disabled_bones.add(bone.bone)
-
-        # curves = {}
-        # for fcurve in armature.animation_data.action.fcurves:
-        #     name = fcurve.data_path.split('"')[1]
-        #     curves.setdefault(name, []).append(fcurve)
-        #
-        # for bone_curves in curves.values():
-        #     bone_curves.sort(key=lambda c: c.array_index)
-
-        transitions = []
-        for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
+    @classmethod
+    def prepare_animation(
+        cls, armature, body_parts: Iterable, matrix: np.ndarray, sample_fcurves: bool = True
+    ) -> Tuple[RawAnimation, Set[str]]:
+        """
+        Positions of bones of the applied Armature converted by the matrix and names of the disabled bones.
+        :param body_parts: parts with uuid and checked, e.g. EnabledPartsCollection, bones of unchecked are disabled
+        """
+        skeleton = HDMSkeleton()
+        disabled = armature.data.body_parts.disabled_mask(body_parts, skeleton)
+        disabled_bones = {skeleton.bones[i] for i in np.flatnonzero(disabled)}
+
+        if sample_fcurves:
+            data = cls.sample_animation(armature, disabled_bones)
+        else:
+            data = cls.evaluate_animation(armature, disabled_bones)
+        convert_coordinates(data, matrix)
+        return data, disabled_bones
+
+    @staticmethod
+    def sample_animation(armature, disabled_bones: Collection[str]) -> RawAnimation:
+        """Calculates positions of bones from fcurves of the Action"""
+        positions, names = sample_tails(armature, range(bpy.context.scene.frame_start, bpy.context.scene.frame_end))
+        animation = RawAnimation(positions, names)
+        animation.positions[:, [animation.index[name] for name in disabled_bones if name in animation.index]] = 0
+        return animation
+
+    @staticmethod
+    def evaluate_animation(armature, disabled_bones: Collection[str]) -> RawAnimation:
+        """Reads positions of bones after the scene is evaluated for every frame"""
+        frames = range(bpy.context.scene.frame_start, bpy.context.scene.frame_end)
+        names = [bone.name for bone in armature.pose.bones]
+        animation = RawAnimation(np.zeros((len(frames), len(names), 3)), names)
+        for frame, positions in zip(frames, animation.positions):
             bpy.context.scene.frame_set(frame)
-            bones = {}
-            for bone in armature.pose.bones:
-                bones[bone.name] = bone.tail.copy()
-            for bone in disabled_bones:
-                bones[bone] = Vector((0, 0, 0))
-            transitions.append(Pose(bones))
+            for i, bone in enumerate(armature.pose.bones):
+                if bone.name not in disabled_bones:
+                    positions[i] = bone.tail
         bpy.context.scene.frame_set(bpy.context.scene.frame_start)
-        data = RawAnimation(transitions, None)
-        if self.invert_yz:
-            invert_yz(data)
-
-        with open(self.filepath, "w") as file:
-            self.export_animation(data, disabled_bones, file)
-        return {"FINISHED"}
+        return animation
 
     def export_animation(self, animation: RawAnimation, disabled_bones: Collection[str], file):
         """Writes animation to a file, kwargs are for"""
@@ -80,7 +99,8 @@ class BaseExportOperator(Operator, ExportHelper):
     def draw(self, context: Context) -> None:
         layout = self.layout
 
-        layout.prop(data=self, property="invert_yz")
+        self.draw_coordinates(layout)
+        layout.prop(data=self, property="sample_fcurves")
         layout.label(text="Enabled Body Parts:")
         box = layout.box()
         columns = box.column_flow(columns=2, align=True)
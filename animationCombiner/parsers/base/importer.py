@@ -1,33 +1,61 @@
 """Module containing all Operators related to Importing actions"""
+import glob
 import os
-from typing import Iterable
+from typing import Dict, Iterable, List
 
 import bpy
-from bpy.props import CollectionProperty, BoolProperty
-from bpy.types import Context, Operator
+import numpy as np
+from bpy.props import CollectionProperty, StringProperty
+from bpy.types import Context, Operator, OperatorFileListElement
 from bpy_extras.io_utils import ImportHelper
 
+from animationCombiner import get_preferences
 from animationCombiner.api.actions import EnabledPartsCollection
+from animationCombiner.api.animation import convert
 from animationCombiner.api.body_parts import BodyPartsConfiguration
 from animationCombiner.api.model import RawAnimation
-from animationCombiner.utils import on_actions_update, copy
-from animationCombiner.api.skeletons import HDMSkeleton
+from animationCombiner.utils import complete_update
+from animationCombiner.api.skeletons import HDMSkeleton, Skeleton
+from animationCombiner.core.batch import ClipJob, load_clip, load_clips
+from animationCombiner.core.clip import frame_count
 from animationCombiner.parsers.error import ParserError
-from animationCombiner.utils.coordinates import invert_yz
-
-
-class BaseImportOperator(Operator, ImportHelper):
+from animationCombiner.utils.coordinates import CoordinatesMixin, convert_coordinates
+
+
+def create_action(group, path: str, arrays: Dict[str, np.ndarray], skeleton: Skeleton, body_parts: Iterable):
+    """
+    Adds new action with the clip into the group. Properties are assigned directly, so no update callbacks are called,
+    the caller needs to call complete_update after all actions are added.
+    :param body_parts: parts with name, uuid and checked, e.g. EnabledPartsCollection
+    """
+    length = frame_count(arrays)
+    action = group.actions.add()
+    for part in body_parts:
+        new_part = action.body_parts.add()
+        new_part.name = part.name
+        new_part.uuid = part.uuid
+        new_part["checked"] = part.checked
+    action.animation.from_arrays(arrays, skeleton)
+    action.length_group["original_length"] = length
+    action.length_group["length"] = length
+    action.length_group["end"] = length
+    action.name = os.path.basename(path)
+    return action
+
+
+class BaseImportOperator(CoordinatesMixin, Operator, ImportHelper):
     """Imports new action"""
 
     bl_idname = "ac.base_import_file"
     bl_label = "Import"
 
+    # Parses an open file into (frames, bones, 3) arrays of all objects without Blender, so it can run in other
+    # processes. Importers without it are loaded only through load_animations.
+    parser = None
+    # Names of bones in the arrays returned by parser
+    names: List[str] = []
+
     body_parts: CollectionProperty(type=EnabledPartsCollection)
-    invert_yz: BoolProperty(
-        name="Use Y for height",
-        description="In Blender Z coordinate is height, set to true if the input file uses Y for height. It does not "
-        "affect functionality, it just improves how it is displayed in Blender.",
-    )
 
     def generate_parts(self, config: BodyPartsConfiguration):
         self.body_parts.clear()
@@ -43,43 +71,150 @@ class BaseImportOperator(Operator, ImportHelper):
     def execute(self, context):
         try:
             path = self.properties.filepath
-            with open(path, "r") as file:
-                raw_animation = self.load_animation(file)
-
-            if self.invert_yz:
-                invert_yz(raw_animation)
-
-            armature = bpy.context.view_layer.objects.active.data
-
-            action = armature.groups[armature.active].actions.add()
-            if len(armature.groups) == 1 and len(armature.groups[armature.active].actions) == 1:
-                action.use_skeleton = True
-            copy(self.body_parts, action.body_parts)
-            action.animation.from_raw(raw_animation, HDMSkeleton())
-            action.length_group.original_length = raw_animation.length
-            action.length_group.length = raw_animation.length
-            action.length_group.end = raw_animation.length
-            action.name = os.path.basename(path)
-            on_actions_update()
+            skeleton = HDMSkeleton()
+            arrays = self.load_arrays(path, skeleton)
+            self.add_action(bpy.context.view_layer.objects.active.data, path, arrays, skeleton)
+            complete_update()
             self.report({"INFO"}, "Imported 1 action")
         except ParserError as err:
             self.report({"WARNING"}, str(err.message))
             return {"CANCELLED"}
+        except ValueError as err:
+            self.report({"WARNING"}, str(err))
+            return {"CANCELLED"}
         return {"FINISHED"}
 
+    def add_action(self, armature, path: str, arrays: Dict[str, np.ndarray], skeleton: Skeleton):
+        """Adds new action into the active group, see create_action"""
+        group = armature.groups[armature.active]
+        action = create_action(group, path, arrays, skeleton, self.body_parts)
+        if len(armature.groups) == 1 and len(group.actions) == 1:
+            action["use_skeleton"] = True
+        return action
+
     def draw(self, context: Context) -> None:
         layout = self.layout
 
-        layout.prop(data=self, property="invert_yz")
+        self.draw_coordinates(layout)
         layout.label(text="Body Parts:")
         box = layout.box()
         columns = box.column_flow(columns=2, align=True)
         for part in self.body_parts:
             columns.prop(part, "checked", text=part.name)
 
+    def file_parser(self, path: str):
+        """Parser for the file in the path, importers can override it to configure parser based on the file"""
+        return self.parser
+
+    def cache_settings(self, path: str, skeleton: Skeleton) -> tuple:
+        """All settings that change how the file is loaded, they are part of the key in the cache"""
+        return tuple(self.coordinate_matrix().ravel()), skeleton.order()
+
+    def clip_job(self, path: str, skeleton: Skeleton) -> ClipJob:
+        """Job that loads the file without Blender, only for importers with parser"""
+        return ClipJob(
+            path=path,
+            parse=self.file_parser(path),
+            permutation=skeleton.permutation(self.names),
+            parents=skeleton.parents,
+            matrix=self.coordinate_matrix(),
+            cache=get_preferences().clip_cache,
+            settings=self.cache_settings(path, skeleton),
+        )
+
+    def load_arrays(self, path: str, skeleton: Skeleton) -> Dict[str, np.ndarray]:
+        """
+        Loads the first animation in the file and converts it into arrays for Animation.
+        If the cache is enabled and it already contains the file, arrays are just memory-mapped from it.
+        """
+        if self.file_parser(path) is not None:
+            return load_clip(self.clip_job(path, skeleton))
+
+        cache = get_preferences().clip_cache
+        if cache is not None:
+            key = cache.key(path, *self.cache_settings(path, skeleton))
+            arrays = cache.get(key)
+            if arrays is not None:
+                return arrays
+
+        with open(path, "r") as file:
+            raw_animation = self.load_animation(file)
+        convert_coordinates(raw_animation, self.coordinate_matrix())
+
+        arrays = convert(raw_animation, skeleton)
+        if cache is not None:
+            cache.put(key, arrays)
+        return arrays
+
     def load_animation(self, file) -> RawAnimation:
         """Loads & returns iterable of transition to achieve the animation"""
         return next(iter(self.load_animations(file)))
 
     def load_animations(self, file) -> Iterable[RawAnimation]:
         """Returns all animations that are present in the file"""
+
+
+class BatchImportMixin:
+    """
+    Imports all selected files, or all files in a directory that match a pattern, each as a new action.
+    Files are loaded in parallel worker processes, so it can be used only with importers that have a parser.
+    """
+
+    bl_label = "Batch Import"
+
+    directory: StringProperty(subtype="DIR_PATH")
+    files: CollectionProperty(type=OperatorFileListElement, options={"HIDDEN", "SKIP_SAVE"})
+    pattern: StringProperty(
+        name="Pattern",
+        description="Glob pattern relative to the directory, e.g. **/*.data. If set, it is used instead of the "
+        "selected files. If neither is set, all files with the extension are imported",
+    )
+
+    def invoke(self, context, _event):
+        self.generate_parts(bpy.context.view_layer.objects.active.data.get_body_parts())
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def paths(self) -> List[str]:
+        """Paths of all files that should be imported"""
+        names = [file.name for file in self.files if file.name]
+        if names and not self.pattern:
+            return [os.path.join(self.directory, name) for name in names]
+        pattern = os.path.join(self.directory, self.pattern or f"*{self.filename_ext}")
+        return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+    def execute(self, context):
+        paths = self.paths()
+        if len(paths) == 0:
+            self.report({"WARNING"}, "No files to import")
+            return {"CANCELLED"}
+        try:
+            self.coordinate_matrix()
+        except ValueError as err:
+            self.report({"WARNING"}, str(err))
+            return {"CANCELLED"}
+
+        skeleton = HDMSkeleton()
+        armature = bpy.context.view_layer.objects.active.data
+        jobs = []
+        for path in paths:
+            # Jobs are created in this process, e.g. AMC importer needs to find and parse the skeleton of every file
+            try:
+                jobs.append(self.clip_job(path, skeleton))
+            except (ParserError, ValueError, AssertionError, OSError) as error:
+                self.report({"WARNING"}, f"{os.path.basename(path)}: {getattr(error, 'message', error)}")
+
+        imported = 0
+        for job, arrays, error in load_clips(jobs):
+            if error is not None:
+                self.report({"WARNING"}, f"{os.path.basename(job.path)}: {getattr(error, 'message', error)}")
+                continue
+            self.add_action(armature, job.path, arrays, skeleton)
+            imported += 1
+        complete_update()
+        self.report({"INFO"}, f"Imported {imported} actions")
+        return {"FINISHED"}
+
+    def draw(self, context: Context) -> None:
+        self.layout.prop(data=self, property="pattern")
+        super().draw(context)
@@ -0,0 +1,36 @@
+"""BVH motion capture format, e.g. the CMU dataset converted by cgspeed"""
+
+# Bone of the HDM05 skeleton -> BVH joint at the end of that bone, end sites are named after their joint with "_end"
+HDM_NAMES = {
+    "root": "Hips",
+    "lhipjoint": "LeftUpLeg",
+    "lfemur": "LeftLeg",
+    "ltibia": "LeftFoot",
+    "lfoot": "LeftToeBase",
+    "ltoes": "LeftToeBase_end",
+    "rhipjoint": "RightUpLeg",
+    "rfemur": "RightLeg",
+    "rtibia": "RightFoot",
+    "rfoot": "RightToeBase",
+    "rtoes": "RightToeBase_end",
+    "lowerback": "Spine",
+    "upperback": "Spine1",
+    "thorax": "Neck",
+    "lowerneck": "Neck1",
+    "upperneck": "Head",
+    "head": "Head_end",
+    "lclavicle": "LeftArm",
+    "lhumerus": "LeftForeArm",
+    "lradius": "LeftHand",
+    "lwrist": "LeftFingerBase",
+    "lhand": "LeftHandIndex1",
+    "lfingers": "LeftHandIndex1_end",
+    "lthumb": "LThumb_end",
+    "rclavicle": "RightArm",
+    "rhumerus": "RightForeArm",
+    "rradius": "RightHand",
+    "rwrist": "RightFingerBase",
+    "rhand": "RightHandIndex1",
+    "rfingers": "RightHandIndex1_end",
+    "rthumb": "RThumb_end",
+}
@@ -0,0 +1,66 @@
+import json
+from functools import partial
+from typing import Dict, List
+
+import bpy
+from bpy.props import StringProperty
+from bpy.types import Context, Operator
+
+from animationCombiner.api.model import RawAnimation
+from animationCombiner.api.skeletons import Skeleton
+from animationCombiner.core import bvh
+from animationCombiner.parsers import importers
+from animationCombiner.parsers.base.importer import BaseImportOperator, BatchImportMixin
+from animationCombiner.parsers.bvh import HDM_NAMES
+from animationCombiner.parsers.error import ParserError
+from animationCombiner.parsers.messif import NAMES
+
+
+@importers.register(name="BVH (.bvh)")
+class BVHLoader(BaseImportOperator, Operator):
+    bl_idname = "ac.bvh_import_file"
+
+    # ImportHelper mixin class uses this
+    filename_ext = ".bvh"
+
+    filter_glob: StringProperty(
+        default="*.bvh",
+        options={"HIDDEN"},
+        maxlen=255,  # Max internal buffer length, longer would be clamped.
+    )
+    name_table: StringProperty(
+        name="Name table",
+        subtype="FILE_PATH",
+        description="JSON file which maps names of HDM05 bones to BVH joints at their end, missing bones use the "
+        "names of the CMU dataset",
+    )
+
+    names = NAMES
+
+    def table(self) -> Dict[str, str]:
+        """Mapping of bones onto BVH joints"""
+        if not self.name_table:
+            return HDM_NAMES
+        try:
+            with open(bpy.path.abspath(self.name_table), "r") as file:
+                return {**HDM_NAMES, **json.load(file)}
+        except (OSError, ValueError) as err:
+            raise ParserError(f"Unable to read name table: {err}") from err
+
+    def file_parser(self, path: str):
+        return partial(bvh.parse, table=self.table(), order=NAMES)
+
+    def cache_settings(self, path: str, skeleton: Skeleton) -> tuple:
+        return *super().cache_settings(path, skeleton), sorted(self.table().items())
+
+    def load_animations(self, file) -> List[RawAnimation]:
+        return [RawAnimation(positions, NAMES) for positions in bvh.parse(file, self.table(), NAMES)]
+
+    def draw(self, context: Context) -> None:
+        self.layout.prop(data=self, property="name_table")
+        super().draw(context)
+
+
+@importers.register(name="BVH (.bvh), multiple files")
+class BVHBatchLoader(BatchImportMixin, BVHLoader, Operator):
+    bl_idname = "ac.bvh_batch_import"
@@ -1,15 +1,34 @@
 from random import randint
 from typing import Collection, Set
 
-from bpy.props import StringProperty, BoolProperty
+from bpy.props import StringProperty, BoolProperty, IntProperty
 from bpy.types import Context, Operator, Event
 
 from animationCombiner.api.model import RawAnimation
+from animationCombiner.core import messif
 from animationCombiner.parsers import exporters
 from animationCombiner.parsers.base.exporter import BaseExportOperator
 from animationCombiner.parsers.messif import NAMES
 
 
+def write_animation(
+    file,
+    animation: RawAnimation,
+    disabled_bones: Collection[str],
+    key: str = "",
+    attach_binary_string: bool = False,
+    precision: int = 6,
+) -> None:
+    """Writes the animation as a single MESSIF object, the key is generated if it is empty"""
+    binary_string = ""
+    if attach_binary_string:
+        binary_string = "".join("0" if name in disabled_bones else "1" for name in NAMES)
+
+    if not key:
+        key = f"{randint(1000, 9999)}_{randint(10, 99)}_{randint(100, 999)}_{randint(100, 999)}"
+    messif.write(file, f"{key};{binary_string}", animation.take(NAMES), precision)
+
+
 @exporters.register(name="MESSIF, HDM05 (.data)")
 class MessifExporter(BaseExportOperator, Operator):
     bl_idname = "ac.messif_export_file"
@@ -31,6 +50,9 @@ class MessifExporter(BaseExportOperator, Operator):
         description="True, if the string of disabled bones should be added to the MESSIF file. This is a non-standard "
         "information, that should not break file compatiblity and will only show as a longer object id",
     )
+    precision: IntProperty(
+        name="Precision", description="Number of decimal places of exported coordinates", default=6, min=1, max=17
+    )
 
     def invoke(self, context: Context, event: Event) -> Set[str]:
         return super().invoke(context, event)
@@ -39,19 +61,7 @@ class MessifExporter(BaseExportOperator, Operator):
         super().draw(context)
         self.layout.prop(data=self, property="key_id")
         self.layout.prop(data=self, property="attach_binary_string")
+        self.layout.prop(data=self, property="precision")
 
     def export_animation(self, animation: RawAnimation, disabled_bones: Collection[str], file):
-        binary_string = ""
-        if self.attach_binary_string:
-            binary_string = "".join("0" if name in disabled_bones else "1" for name in NAMES)
-
-        key = self.key_id
-        if not key:
-            key = f"{randint(1000, 9999)}_{randint(10, 99)}_{randint(100, 999)}_{randint(100, 999)}"
-        file.write(f"#objectKey messif.objects.keys.AbstractObjectKey {key};{binary_string}\n")
-        file.write(f"{len(animation.poses)};mcdr.objects.ObjectMocapPose\n")
-        for pose in animation.poses:
-            data = []
-            for name in NAMES:
-                data.append(pose.bones[name])
-            file.write("; ".join(f"{vec[0]}, {vec[1]}, {vec[2]}" for vec in data) + "\n")
+        write_animation(file, animation, disabled_bones, self.key_id, self.attach_binary_string, self.precision)
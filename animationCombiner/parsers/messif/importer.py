@@ -1,18 +1,32 @@
-from typing import Collection
+from collections.abc import Sequence
+from functools import partial
+from typing import Union
 
-import numpy
-import numpy as np
 from bpy.props import StringProperty
 from bpy.types import Operator
-from mathutils import Vector
 
-from animationCombiner.api.model import Pose, RawAnimation
-from animationCombiner.api.skeletons import HDMSkeleton
+from animationCombiner.api.model import RawAnimation
+from animationCombiner.core import messif
 from animationCombiner.parsers import importers
-from animationCombiner.parsers.base.importer import BaseImportOperator
+from animationCombiner.parsers.base.importer import BaseImportOperator, BatchImportMixin
 from animationCombiner.parsers.messif import NAMES
 
 
+class MessifAnimations(Sequence):
+    """Animations of all objects in the file, each object is parsed only when it is accessed by position or by key"""
+
+    def __init__(self, objects: Sequence) -> None:
+        self.objects = objects
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __getitem__(self, item: Union[int, str, slice]):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        return RawAnimation(self.objects[item], NAMES)
+
+
 @importers.register(name="MESSIF, HDM05 (.data)")
 class MessifLoader(BaseImportOperator, Operator):
     bl_idname = "ac.messif_import_file"
@@ -26,38 +40,17 @@ class MessifLoader(BaseImportOperator, Operator):
         maxlen=255,  # Max internal buffer length, longer would be clamped.
     )
 
-    def parse(self, file):
-        animations = []
-        animation = []
-        i = 0
-
-        while line := file.readline():
-            i += 1
-            if line.startswith("#objectKey"):
-                if len(animation) > 0:
-                    animations.append(animation)
-                animation = []
-                # ignore type line
-                file.readline()
-                i += 1
-            else:
-                animation.append(self.parse_skeleton(line, i))
-        if len(animation) > 0:
-            animations.append(animation)
-        return animations
-
-    def load_animations(self, file) -> Collection[RawAnimation]:
-        animations = []
-        for animation in self.parse(file):
-            animations.append(RawAnimation(animation, HDMSkeleton()))
-        return animations
-
-    def parse_skeleton(self, line, line_number):
-        bones = {}
-        vectors = line.split(";")
-        assert len(vectors) == len(NAMES), f"Incompatible skeleton at line {line_number}"
-        for i, vector in enumerate(vectors):
-            numbers = vector.split(",")
-            assert len(numbers) == 3, f"Incorrect vector dimensions at line {line_number}"
-            bones[NAMES[i]] = Vector(np.asarray(numbers, dtype=numpy.double))
-        return Pose(bones=bones)
+    parser = partial(messif.parse, bones=len(NAMES))
+    names = NAMES
+
+    def parse(self, file) -> Sequence:
+        """Parses every object in the file into a single (frames, bones, 3) array, see messif.parse"""
+        return messif.parse(file, len(NAMES))
+
+    def load_animations(self, file) -> MessifAnimations:
+        return MessifAnimations(self.parse(file))
+
+
+@importers.register(name="MESSIF, HDM05 (.data), multiple files")
+class MessifBatchLoader(BatchImportMixin, MessifLoader, Operator):
+    bl_idname = "ac.messif_batch_import"
@@ -1,8 +1,10 @@
-from bpy.props import IntProperty, CollectionProperty, StringProperty
+import bpy
+from bpy.props import IntProperty, CollectionProperty, StringProperty, BoolProperty
 from bpy.types import AddonPreferences, UIList, Operator
 
 from animationCombiner import get_preferences
-from animationCombiner.api.body_parts import BodyPartsConfiguration
+from animationCombiner.api.body_parts import BodyPartsConfiguration, invalidate_masks
+from animationCombiner.core.cache import ClipCache
 from animationCombiner.ui.table_controls import BaseControlsMixin, BaseDeleteItem
 
 
@@ -37,6 +39,11 @@ DEFAULT_BODY_PARTS = {
 }
 
 
+def cache_directory(create: bool = False) -> str:
+    """Directory of the clip cache, it is among data files, so it is not synchronized with the configuration"""
+    return bpy.utils.user_resource("DATAFILES", path="animationCombiner/cache", create=create)
+
+
 class AnimationCombinerPreferences(AddonPreferences):
     # this must match the add-on name, use '__package__'
     # when defining this in a submodule of a python package.
@@ -44,10 +51,24 @@ class AnimationCombinerPreferences(AddonPreferences):
 
     body_parts_config: CollectionProperty(type=BodyPartsConfiguration)
     bone_parts_active: IntProperty(default=0)
+    use_cache: BoolProperty(
+        name="Cache imported clips",
+        default=True,
+        description="Stores parsed and solved clips, so importing the same file again does not need to process it",
+    )
+    cache_size: IntProperty(
+        name="Cache size (MB)", default=1024, min=0, description="Maximal size of the cache of imported clips"
+    )
 
     def draw(self, context):
         layout = self.layout
 
+        row = layout.row()
+        row.prop(self, "use_cache")
+        row.prop(self, "cache_size")
+        row.operator(ClearCache.bl_idname, icon="TRASH")
+        layout.label(text=f"Cache directory: {cache_directory()}", icon="FILE_FOLDER")
+
         layout.label(text="Body parts:")
         grid = layout.grid_flow(columns=2)
         grid.operator(AddBodyPart.bl_idname, text="Add new part", icon="ADD")
@@ -82,6 +103,26 @@ class AnimationCombinerPreferences(AddonPreferences):
     def body_parts(self):
         return self.active_config.body_parts
 
+    @property
+    def clip_cache(self):
+        """Cache of imported clips in the user directory of the add-on, None if it is disabled"""
+        if not self.use_cache:
+            return None
+        return ClipCache(cache_directory(create=True), self.cache_size * 1024 * 1024)
+
+
+class ClearCache(Operator):
+    """Removes all imported clips from the cache"""
+
+    bl_idname = "ac.clear_cache"
+    bl_label = "Clear cache"
+
+    def execute(self, context):
+        ClipCache(cache_directory(), 0).clear()
+        # Older versions kept the cache in the configuration directory
+        ClipCache(bpy.utils.user_resource("CONFIG", path="animationCombiner/cache"), 0).clear()
+        return {"FINISHED"}
+
 
 # Body Part controls
 class ResetBodyParts(Operator):
@@ -132,6 +173,9 @@ class BoneControlsMixin(BaseControlsMixin):
 
     body_part: StringProperty()
 
+    def callback(self):
+        invalidate_masks()
+
     @property
     def active(self):
         for body_part in get_preferences().body_parts:
@@ -4,7 +4,7 @@ from bpy.types import Operator, UIList, Panel, Context, Menu
 
 from animationCombiner.ui.menus import ImporterMenu
 from animationCombiner.utils import on_actions_update
-from animationCombiner.operators import SelectGroupOperator, MoveActionToGroupOperator
+from animationCombiner.operators import SelectGroupOperator, MoveActionToGroupOperator, DuplicateActionOperator
 from animationCombiner.ui.action import ActionPanel
 from animationCombiner.ui.table_controls import BaseControlsMixin, BaseDeleteItem
 
@@ -58,6 +58,8 @@ class ActionControlsMixin(BaseControlsMixin):
         obj.groups[obj.active].active = active
 
     def callback(self):
+        obj = bpy.context.object.data
+        obj.groups[obj.active].dirty = True
         on_actions_update()
 
     @property
@@ -72,6 +74,11 @@ class DeleteActionOperator(ActionControlsMixin, BaseDeleteItem, Operator):
 
     bl_idname = "ac.actions_delete_item"
 
+    def execute(self, context):
+        if 0 <= self.active < len(self.list):
+            self.list[self.active].animation.release()
+        return super().execute(context)
+
 
 class GroupSelect(Menu):
     bl_idname = "AC_MT_group_select"
@@ -122,6 +129,7 @@ class ActionListPanel(Panel):
 
         row = layout.row(align=True)
         row.menu(ImporterMenu.bl_idname, text="Import", icon="IMPORT")
+        row.operator(DuplicateActionOperator.bl_idname, text="Duplicate", icon="DUPLICATE")
         row.operator(DeleteActionOperator.bl_idname, text="Delete", icon="REMOVE")
 
         row = layout.row(align=True)
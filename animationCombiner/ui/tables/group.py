@@ -85,6 +85,9 @@ class DeleteGroupOperator(GroupsControlsMixin, BaseDeleteItem, Operator):
 
     def execute(self, context):
         index = self.active
+        if 0 <= index < len(self.list):
+            for action in self.list[index].actions:
+                action.animation.release()
         result = super().execute(context)
         if index != self.active:
             bpy.context.object.data.move_to_group = self.active
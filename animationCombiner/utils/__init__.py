@@ -1,9 +1,15 @@
 """Collection of all utility functions/classes that didnt fit anywhere else"""
+import re
+
 import bpy
+import numpy as np
 import typing
+from typing import Dict, Optional, Set
 from bpy.types import PropertyGroup, Property, bpy_prop_collection, EditBone, Armature
 from mathutils import Vector
 
+from animationCombiner.core import composition
+
 if typing.TYPE_CHECKING:
     from animationCombiner.api.model import Pose
 
@@ -23,7 +29,10 @@ def copy(from_prop: Property, to_prop: Property, depth=0) -> None:
     if type(from_prop) != type(to_prop):
         return
 
-    if isinstance(from_prop, PropertyGroup):
+    if isinstance(from_prop, PropertyGroup) and hasattr(to_prop, "copy_from"):
+        # Groups with bulk data copy themselves, e.g. arrays of Animation
+        to_prop.copy_from(from_prop)
+    elif isinstance(from_prop, PropertyGroup):
         for propname in from_prop.__annotations__.keys():
             from_subprop = getattr(from_prop, propname)
             if isinstance(from_subprop, PropertyGroup) or isinstance(from_subprop, bpy_prop_collection):
@@ -35,6 +44,10 @@ def copy(from_prop: Property, to_prop: Property, depth=0) -> None:
                 #     to_prop.name += "_copy"
                 except (AttributeError, TypeError):
                     pass
+        # Custom properties that are not defined as annotations, e.g. arrays of Animation
+        for key in from_prop.keys():
+            if key not in from_prop.__annotations__:
+                to_prop[key] = from_prop[key]
 
     elif isinstance(from_prop, bpy_prop_collection):
         to_prop.clear()
@@ -42,58 +55,224 @@ def copy(from_prop: Property, to_prop: Property, depth=0) -> None:
             copy(from_subprop, to_prop.add(), depth + 1)
 
 
+GROUP_PATH = re.compile(r"groups\[(\d+)\](?:\.actions\[(\d+)\])?")
+
+
+def mark_dirty(prop=None) -> None:
+    """Marks ActionGroup, and Action if there is one, which contain the changed property, to be baked again on apply"""
+    if prop is None or not isinstance(getattr(prop, "id_data", None), Armature):
+        return
+    match = GROUP_PATH.match(prop.path_from_id())
+    if match is None:
+        return
+    group = prop.id_data.groups[int(match[1])]
+    group.dirty = True
+    if match[2] is not None:
+        group.actions[int(match[2])].dirty = True
+
+
+def mark_all_dirty(self=None, context=None):
+    """Marks every ActionGroup to be baked again, needed when the base skeleton changes"""
+    from animationCombiner.utils.rotation import FRAME_CACHE
+
+    FRAME_CACHE.clear()
+    for group in bpy.context.view_layer.objects.active.data.groups:
+        group.dirty = True
+    if is_action_data(self):
+        SCHEDULER.schedule(self, errors=True, everything=True)
+    else:
+        update_errors(self, context)
+
+
+def on_parts_update(self=None, context=None):
+    """Drops cached mask of the Action whose body part was checked or unchecked"""
+    if is_action_data(self):
+        match = GROUP_PATH.match(self.path_from_id())
+        if match is not None and match[2] is not None:
+            self.id_data.groups[int(match[1])].actions[int(match[2])].pop("enabled_mask", None)
+    update_errors(self, context)
+
+
+# Seconds for which changes of actions are collected before lengths and errors are recalculated
+UPDATE_DELAY = 0.05
+
+
+class UpdateScheduler:
+    """
+    Coalesces update callbacks of actions, which are fired many times per second when a slider is dragged.
+    Callbacks only record which groups changed, they are recalculated once by a timer.
+    """
+
+    def __init__(self) -> None:
+        # Name of the Armature -> indices of changed groups, None if all groups need to be recalculated
+        self.lengths: Dict[str, Optional[Set[int]]] = {}
+        self.errors: Dict[str, Optional[Set[int]]] = {}
+
+    @staticmethod
+    def _add(pending: Dict[str, Optional[Set[int]]], name: str, group: Optional[int]) -> None:
+        if group is None:
+            pending[name] = None
+        elif name not in pending:
+            pending[name] = {group}
+        elif pending[name] is not None:
+            pending[name].add(group)
+
+    def schedule(self, prop, lengths: bool = False, errors: bool = False, everything: bool = False) -> None:
+        """Records change of the property, all groups are recalculated if everything is set"""
+        armature = prop.id_data
+        match = GROUP_PATH.match(prop.path_from_id())
+        group = None if everything or match is None else int(match[1])
+        if lengths:
+            self._add(self.lengths, armature.name, group)
+        if errors:
+            self._add(self.errors, armature.name, group)
+        armature.is_applied = False
+        if not bpy.app.timers.is_registered(run_updates):
+            bpy.app.timers.register(run_updates, first_interval=UPDATE_DELAY)
+
+    def invalidate(self, armature) -> None:
+        """
+        Drops pending lengths of the Armature, which the caller recalculates for all groups, and widens pending errors
+        to all groups, as indices of groups are not valid anymore once a group is deleted or moved.
+        """
+        self.lengths.pop(armature.name, None)
+        if armature.name in self.errors:
+            self.errors[armature.name] = None
+
+    def discard(self, armature) -> None:
+        """Drops pending changes of the Armature, e.g. because it was just recalculated completely"""
+        self.lengths.pop(armature.name, None)
+        self.errors.pop(armature.name, None)
+
+    def run(self) -> None:
+        """Recalculates all groups that changed since the last run"""
+        lengths, errors = self.lengths, self.errors
+        self.lengths, self.errors = {}, {}
+        for name, groups in lengths.items():
+            armature = bpy.data.armatures.get(name)
+            if armature is not None:
+                calculate_lengths(armature, groups)
+        for name, groups in errors.items():
+            armature = bpy.data.armatures.get(name)
+            if armature is not None:
+                calculate_errors(armature, groups)
+
+
+SCHEDULER = UpdateScheduler()
+
+
+def run_updates():
+    """Timer, which runs the scheduled updates and then unregisters itself"""
+    SCHEDULER.run()
+    return None
+
+
+def flush_updates():
+    """Runs scheduled updates immediately, for operators that need lengths and errors to be up-to-date"""
+    if bpy.app.timers.is_registered(run_updates):
+        bpy.app.timers.unregister(run_updates)
+    SCHEDULER.run()
+
+
+def unregister():
+    if bpy.app.timers.is_registered(run_updates):
+        bpy.app.timers.unregister(run_updates)
+
+
+def is_action_data(prop) -> bool:
+    """True, if the property belongs to an Armature, so the change can be scheduled for its group"""
+    return prop is not None and isinstance(getattr(prop, "id_data", None), Armature)
+
+
 def on_actions_update(self=None, context=None):
     """Recalculates length of final animation after the actions were updated"""
+    mark_dirty(self)
+    if is_action_data(self):
+        SCHEDULER.schedule(self, lengths=True)
+        return
     armature = bpy.context.view_layer.objects.active.data
-    length = 0
-    for group in armature.groups:
-        group_length = 0
+    # Called without a property after groups or actions were added, deleted or moved
+    SCHEDULER.invalidate(armature)
+    calculate_lengths(armature)
+    armature.is_applied = False
+
+
+def calculate_lengths(armature, groups: Optional[Set[int]] = None) -> None:
+    """Recalculates lengths of the groups, or of all groups if None, and the total length of the animation"""
+    length = 0 if groups is None else armature.animation_length
+    for index, group in enumerate(armature.groups):
+        if groups is not None and index not in groups:
+            continue
+        timings = []
         for action in group.actions:
             if not action.enabled:
                 continue
-            group_length = max(action.length_group.length, group_length)
-            action.length_group.length = action.length_group.real_length + action.transition.real_length
             action.length_group.update_end()
             action.length_group.update_start()
+            timing = action.timing()
+            action.length_group.length = timing.length
+            timings.append(timing)
+        group_length = composition.Group(timings).length
+        length += group_length - (0 if groups is None else group.length)
         group.length = group_length
         group.actions_count = len(group.actions)
-        length += group_length
     armature.animation_length = length
-    armature.is_applied = False
 
 
 def complete_update(self=None, context=None):
+    if is_action_data(self):
+        mark_dirty(self)
+        SCHEDULER.schedule(self, lengths=True, errors=True, everything=True)
+        return
     on_actions_update(self, context)
     update_errors(self, context)
 
 
 def update_errors(self=None, context=None):
+    mark_dirty(self)
+    if is_action_data(self):
+        SCHEDULER.schedule(self, errors=True)
+        return
     armature = bpy.context.view_layer.objects.active.data
+    SCHEDULER.errors.pop(armature.name, None)
+    calculate_errors(armature)
+    armature.is_applied = False
+
+
+def calculate_errors(armature, groups: Optional[Set[int]] = None) -> None:
+    """
+    Recalculates errors of the groups, or of all groups if None. Other groups are only scanned for actions with
+    skeleton, as multiple skeletons are reported in the group in which the second one is.
+    """
+    from animationCombiner.api.skeletons import HDMSkeleton
+
+    skeleton = HDMSkeleton()
     use_skeleton = False
-    for group in armature.groups:
-        group.errors.clear()
-        parts = set()
+    for index, group in enumerate(armature.groups):
+        recalculate = groups is None or index in groups
+        if recalculate:
+            group.errors.clear()
+        used = np.zeros(len(skeleton.bones), dtype=bool)
         has_movement = False
         for action in group.actions:
             if not action.enabled:
                 continue
             if action.use_skeleton:
-                if use_skeleton:
+                if use_skeleton and recalculate:
                     group.add_error("MULTIPLE_SKELETONS")
                 use_skeleton = True
+            if not recalculate:
+                continue
             if action.use_movement:
                 if has_movement:
                     group.add_error("MULTIPLE_MOVEMENTS")
                 has_movement = True
-            for part in action.body_parts:
-                if part.checked:
-                    if part.uuid in parts:
-                        group.add_error("COLLIDING_PARTS")
-                        break
-                    parts.add(part.uuid)
-    if not use_skeleton and len(armature.groups) > 0:
+            mask = action.enabled_mask(skeleton)
+            if np.any(used & mask):
+                group.add_error("COLLIDING_PARTS")
+            used |= mask
+    if not use_skeleton and len(armature.groups) > 0 and (groups is None or 0 in groups):
         armature.groups[0].add_error("NO_SKELETONS")
-    armature.is_applied = False
 
 
 def create_armature(name: str = "Armature", exit_mode="POSE"):
@@ -1,12 +1,53 @@
-from mathutils import Matrix
+import numpy as np
+from bpy.props import BoolProperty, EnumProperty, FloatProperty
 
 from animationCombiner.api.model import RawAnimation
+from animationCombiner.core import coordinates
 
-invert_xz_matrix = Matrix([(1, 0, 0, 0), (0, 0, 1, 0), (0, 1, 0, 0), (0, 0, 0, 1)])
+AXIS_ITEMS = [(axis, axis, "") for axis in ("X", "Y", "Z", "-X", "-Y", "-Z")]
 
 
-def invert_yz(animation: RawAnimation):
-    """Provides in-place conversion between XYZ and XZY coordinate systems"""
-    for pose in animation.poses:
-        for position in pose.bones.values():
-            position.rotate(invert_xz_matrix)
+class CoordinatesMixin:
+    """Axis convention and unit scale of the file, for both importers and exporters"""
+
+    up_axis: EnumProperty(
+        name="Up",
+        items=AXIS_ITEMS,
+        default="Z",
+        description="Axis of the file that is used for height, Blender uses Z",
+    )
+    forward_axis: EnumProperty(
+        name="Forward",
+        items=AXIS_ITEMS,
+        default="Y",
+        description="Axis of the file that points forward, Blender uses Y",
+    )
+    mirror_axis: BoolProperty(
+        name="Mirror",
+        description="Flips the side axis, set to true if the file uses a left-handed coordinate system. Swap of Y and "
+        "Z axes is Up Y, Forward Z and Mirror",
+    )
+    unit_scale: FloatProperty(
+        name="Unit Scale",
+        default=1.0,
+        min=1e-6,
+        soft_min=0.001,
+        soft_max=1000,
+        description="Size of the unit of the file in Blender units, e.g. 0.001 if the file is in millimeters",
+    )
+
+    def coordinate_matrix(self) -> np.ndarray:
+        """Matrix which converts positions from the file into Blender"""
+        return coordinates.conversion_matrix(self.up_axis, self.forward_axis, self.mirror_axis, self.unit_scale)
+
+    def draw_coordinates(self, layout) -> None:
+        row = layout.row(align=True)
+        row.prop(data=self, property="up_axis")
+        row.prop(data=self, property="forward_axis")
+        layout.prop(data=self, property="mirror_axis")
+        layout.prop(data=self, property="unit_scale")
+
+
+def convert_coordinates(animation: RawAnimation, matrix: np.ndarray):
+    """Converts positions of the whole animation with the matrix from core.coordinates.conversion_matrix"""
+    animation.positions = coordinates.convert(animation.positions, matrix)
@@ -0,0 +1,99 @@
+"""
+Evaluates positions of Armature bones directly from fcurves of its Action, see animationCombiner.core.kinematics for the
+math. This module only reads the data from Blender, so no scene needs to be evaluated for every frame.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from animationCombiner.core.kinematics import (
+    axis_angle_quaternions,
+    compose,
+    euler_matrices,
+    pose_tails,
+    quaternion_matrices,
+)
+
+
+# Values of Keyframe.interpolation read by foreach_get, same as BEZT_IPO_CONST and BEZT_IPO_LIN in Blender
+CONSTANT, LINEAR = 0, 1
+
+
+def sample_fcurve(fcurve, frames: np.ndarray) -> np.ndarray:
+    """
+    Values of the fcurve in every frame. Keyframes are read all at once and interpolated by NumPy, which is exact for
+    frames on keyframes and between keyframes with constant or linear interpolation, and for constant extrapolation.
+    Other frames, that is between keyframes with Bezier or easing interpolation or extrapolated linearly, and all frames
+    of fcurves with modifiers are evaluated by Blender one by one.
+    """
+    points = fcurve.keyframe_points
+    if len(points) == 0 or len(fcurve.modifiers) > 0:
+        return np.fromiter((fcurve.evaluate(frame) for frame in frames), dtype=np.float64, count=len(frames))
+
+    co = np.empty(len(points) * 2, dtype=np.float32)
+    points.foreach_get("co", co)
+    keys, key_values = co[0::2].astype(np.float64), co[1::2].astype(np.float64)
+    interpolation = np.empty(len(points), dtype=np.int32)
+    points.foreach_get("interpolation", interpolation)
+
+    # Linear between keyframes and constant outside of them
+    values = np.interp(frames, keys, key_values)
+    segment = np.clip(np.searchsorted(keys, frames, side="right") - 1, 0, len(keys) - 1)
+    between = (frames > keys[0]) & (frames < keys[-1]) & (keys[segment] != frames)
+    constant = between & (interpolation[segment] == CONSTANT)
+    values[constant] = key_values[segment[constant]]
+
+    evaluated = between & (interpolation[segment] != CONSTANT) & (interpolation[segment] != LINEAR)
+    if fcurve.extrapolation != "CONSTANT":
+        evaluated |= (frames < keys[0]) | (frames > keys[-1])
+    for index in np.flatnonzero(evaluated):
+        values[index] = fcurve.evaluate(frames[index])
+    return values
+
+
+def sample_channels(pose_bone, prop: str, fcurves: dict, frames: np.ndarray) -> np.ndarray:
+    """Values of the property in every frame, indices without fcurve keep the current value of the pose bone"""
+    current = np.array(getattr(pose_bone, prop), dtype=np.float64)
+    values = np.tile(current, (len(frames), 1))
+    data_path = pose_bone.path_from_id(prop)
+    for index in range(len(current)):
+        fcurve = fcurves.get((data_path, index))
+        if fcurve is not None and not fcurve.mute:
+            values[:, index] = sample_fcurve(fcurve, frames)
+    return values
+
+
+def sample_basis(pose_bone, fcurves: dict, frames: np.ndarray) -> np.ndarray:
+    """Local transformation matrices of the pose bone in every frame"""
+    mode = pose_bone.rotation_mode
+    if mode == "QUATERNION":
+        rotations = quaternion_matrices(sample_channels(pose_bone, "rotation_quaternion", fcurves, frames))
+    elif mode == "AXIS_ANGLE":
+        axis_angles = sample_channels(pose_bone, "rotation_axis_angle", fcurves, frames)
+        rotations = quaternion_matrices(axis_angle_quaternions(axis_angles))
+    else:
+        rotations = euler_matrices(sample_channels(pose_bone, "rotation_euler", fcurves, frames), mode)
+    return compose(
+        sample_channels(pose_bone, "location", fcurves, frames),
+        rotations,
+        sample_channels(pose_bone, "scale", fcurves, frames),
+    )
+
+
+def sample_tails(armature, frames) -> Tuple[np.ndarray, List[str]]:
+    """
+    Calculates positions of tails of all pose bones, same as PoseBone.tail, in every frame.
+    Returns (frames, bones, 3) array and names of bones in the order of pose bones.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    action = armature.animation_data.action if armature.animation_data else None
+    fcurves = {(fcurve.data_path, fcurve.array_index): fcurve for fcurve in action.fcurves} if action else {}
+
+    pose_bones = armature.pose.bones
+    names = [bone.name for bone in pose_bones]
+    index = {name: i for i, name in enumerate(names)}
+    parents = np.array([index[bone.parent.name] if bone.parent else -1 for bone in pose_bones], dtype=int)
+    rest = np.array([np.array(bone.bone.matrix_local) for bone in pose_bones], dtype=np.float64).reshape((-1, 4, 4))
+    lengths = np.array([bone.bone.length for bone in pose_bones], dtype=np.float64)
+    basis = np.stack([sample_basis(bone, fcurves, frames) for bone in pose_bones], axis=1)
+    return pose_tails(rest, lengths, parents, basis.reshape((len(frames), len(names), 4, 4))), names
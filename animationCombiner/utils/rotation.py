@@ -1,106 +1,57 @@
 """
-Very ugly and ineffective way to properly calculate rotations for Armatures from only positions:
-* Create Armature A:
-* Create Armature B from Rest Pose
-* For Every frame:
-    * Set Armature A to positions from frame
-    * Set Armature B to copy Armature A
-    * Save rotation from Armature B
-
+Calculates rotations for Armatures from only positions, see animationCombiner.core.rotation for the math.
+This module only converts Poses into arrays and back.
 """
 import typing
-from contextlib import contextmanager
 
-import bpy
-from bpy.types import Armature
+import numpy as np
 from mathutils import Quaternion
 
-from animationCombiner.api.skeletons import HDMSkeleton
-from animationCombiner.utils import create_armature, create_bones
+from animationCombiner.api.skeletons import HDMSkeleton, Skeleton
+from animationCombiner.core.rotation import solve_rotations
 
 if typing.TYPE_CHECKING:
     from animationCombiner.api.model import Pose
 
 
-def set_bone(pose: "Pose", bone):
-    """Sets bone tail to the specific position"""
-    if bone.parent:
-        bone.head = bone.parent.tail
-    bone.tail = pose.bones[bone.name]
-
-    for child in bone.children:
-        set_bone(pose, child)
-
-
-def transform_bone(target: Armature, source: Armature, bone):
-    """Transforms from one armature to another"""
-    target_bone = source.pose.bones[bone.name]
-    target_matrix = source.convert_space(
-        pose_bone=target_bone, matrix=target_bone.matrix_basis, from_space="LOCAL_WITH_PARENT", to_space="WORLD"
-    )
-
-    final = target.convert_space(pose_bone=bone, matrix=target_matrix, from_space="WORLD", to_space="LOCAL")
-    bone.rotation_quaternion = final.to_quaternion()
-    bpy.context.view_layer.update()
-
-    for child in bone.children:
-        transform_bone(target, source, child)
-
-
-@contextmanager
-def create_rotation_armatures(initial_pose, skeleton):
-    """Creates two temporary armatures, which can be used for rotation calculations"""
-    mode = bpy.context.object.mode
-    original = bpy.context.view_layer.objects.active
-    bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
-    armature_a = create_armature("A1", exit_mode="EDIT")
-    create_bones(armature_a.data, skeleton, initial_pose)
-
-    bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
-    armature_b = create_armature("B1", exit_mode="EDIT")
-    create_bones(armature_b.data, skeleton, initial_pose)
+def to_array(poses: list["Pose"], skeleton: Skeleton) -> np.ndarray:
+    """Converts poses into (frames, bones, 3) array in the skeleton order"""
+    order = skeleton.order()
+    return np.array([pose.take(order) for pose in poses], dtype=np.float64).reshape((len(poses), len(order), 3))
 
-    try:
-        yield armature_a, armature_b
-    finally:
-        bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
-        bpy.data.objects.remove(armature_a)
-        bpy.data.objects.remove(armature_b)
-        bpy.context.view_layer.objects.active = original
-        bpy.ops.object.mode_set(mode=mode, toggle=False)
 
+class FrameCache:
+    """
+    Rotations of poses into a single base pose, they are memoized as the same clip always has the same difference.
+    Poses are compared by their positions, the memo is cleared when a different base pose is used.
+    """
 
-def calculate_frame(armature_a: Armature, armature_b: Armature, pose: "Pose") -> dict[str, Quaternion]:
-    """Calculates rotation difference between initial pose and pose specified"""
-    rotations = {}
-    bpy.context.view_layer.objects.active = armature_a
-    bpy.ops.object.mode_set(mode="EDIT", toggle=False)
-    set_bone(pose, armature_a.data.edit_bones.get("root"))
-    bpy.context.view_layer.update()
+    # Maximal number of remembered poses, the oldest one is forgotten first
+    MAX_SIZE = 256
 
-    bpy.context.view_layer.objects.active = armature_b
-    bpy.ops.object.mode_set(mode="POSE", toggle=False)
-    transform_bone(armature_b, armature_a, armature_b.pose.bones["root"])
-    for bone in armature_b.pose.bones:
-        rotations[bone.name] = bone.rotation_quaternion.copy()
-    return rotations
+    def __init__(self) -> None:
+        self.base = None
+        self.rotations: typing.Dict[typing.Tuple[str, bytes], np.ndarray] = {}
 
+    def clear(self) -> None:
+        self.base = None
+        self.rotations.clear()
 
-def calculate_frames(poses: list["Pose"]) -> list[dict[str, Quaternion]]:
-    """Calculates rotation difference between initial pose and all other poses"""
-    frames = []
-    with create_rotation_armatures(poses[0], HDMSkeleton()) as armatures:
-        armature_a, armature_b = armatures
-        for pose in poses[1:]:
-            frames.append(calculate_frame(armature_a, armature_b, pose))
+    def calculate_frame(self, initial_pose: "Pose", pose: "Pose", skeleton: Skeleton = None) -> dict[str, Quaternion]:
+        """Calculates rotation difference between initial pose and pose, it is solved only once for every pose"""
+        skeleton = skeleton or HDMSkeleton()
+        order = skeleton.order()
+        base = to_array([initial_pose], skeleton)[0]
+        if self.base is None or not np.array_equal(self.base, base):
+            self.clear()
+            self.base = base
+        positions = to_array([pose], skeleton)
+        key = (",".join(order), positions.tobytes())
+        if key not in self.rotations:
+            if len(self.rotations) >= self.MAX_SIZE:
+                del self.rotations[next(iter(self.rotations))]
+            self.rotations[key] = solve_rotations(base, positions, skeleton.parents)[0]
+        return {name: Quaternion(rotation) for name, rotation in zip(order, self.rotations[key])}
 
-    # stabilize animation
-    for i in range(len(frames) - 1):
-        pose1 = frames[i]
-        pose2 = frames[i + 1]
-        for bone, rotation in pose1.items():
-            rotation2 = pose2[bone]
-            if rotation.dot(rotation2) < 0:
-                pose2[bone].negate()
 
-    return frames
+FRAME_CACHE = FrameCache()
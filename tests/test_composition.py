@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from animationCombiner.core.composition import Action, Group, Transition
+from animationCombiner.core.rotation import multiply
+
+BASE = np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0]])
+
+
+def action(frames: int = 3, slowdown: int = 1, transition: Transition = Transition(), movement=None, **kwargs):
+    rotations = np.random.default_rng(frames).normal(size=(frames, 2, 4))
+    rotations /= np.linalg.norm(rotations, axis=-1, keepdims=True)
+    return Action(
+        start=0,
+        end=frames,
+        slowdown=slowdown,
+        transition=transition,
+        rotations=rotations,
+        base=BASE,
+        translations=movement,
+        **kwargs,
+    )
+
+
+def test_base_key_at_frame_start():
+    timeline = action(slowdown=2).timeline(frame_start=10)
+
+    assert list(timeline.frames) == [10, 10, 12, 14]
+    assert np.array_equal(timeline.rotations[0], BASE)
+    # Frames of the action replace the base key on the same frame
+    assert np.allclose(timeline.rotations[1:], multiply(BASE, action(slowdown=2).rotations))
+
+
+def test_base_key_without_frames():
+    timeline = action(frames=0).timeline(frame_start=5)
+
+    assert list(timeline.frames) == [5]
+    assert np.array_equal(timeline.rotations, BASE[None])
+    assert timeline.end == 6
+
+
+def test_reset_key():
+    timeline = action(transition=Transition(length=4, reset=True, reset_length=3)).timeline(frame_start=10)
+
+    assert list(timeline.frames) == [10, 10, 11, 12, 15]
+    assert np.array_equal(timeline.rotations[-1], BASE)
+    assert timeline.end == 15 + 4
+
+
+@pytest.mark.parametrize(
+    "slowdown,transition,end", [(1, Transition(), 13), (2, Transition(length=5), 19), (3, Transition(length=1), 17)]
+)
+def test_end(slowdown, transition, end):
+    """End is the last frame of the action and the length of the transition"""
+    timeline = action(slowdown=slowdown, transition=transition).timeline(frame_start=10)
+
+    assert timeline.end == timeline.frames[-1] + transition.length == end
+
+
+def test_group_end_is_longest_action():
+    group = Group([action(frames=2), action(frames=5), action(frames=8, enabled=False)])
+    timelines, end, _ = group.timelines(frame_start=3)
+
+    assert timelines[2] is None
+    assert end == max(timeline.end for timeline in timelines[:2]) == 3 + 4 + 1
+
+
+def test_location_telescoping():
+    """Each action with movement starts where the previous one ended, actions without movement keep the location"""
+    walk = np.array([[5.0, 5.0, 0.0], [6.0, 5.0, 0.0], [8.0, 6.0, 0.0]])
+    turn = np.array([[0.0, 0.0, 1.0], [0.0, 2.0, 1.0], [0.0, 3.0, 1.0]])
+    group = Group([action(movement=walk), action(), action(movement=turn)])
+    timelines, _, location = group.timelines(frame_start=0, location=(1.0, 0.0, 0.0))
+
+    assert np.allclose(timelines[0].locations, [[1, 0, 0], [2, 0, 0], [4, 1, 0]])
+    assert len(timelines[1].locations) == 0
+    assert np.allclose(timelines[2].locations, [[4, 1, 0], [4, 3, 0], [4, 4, 0]])
+    assert np.array_equal(timelines[2].location_frames, timelines[2].frames[1:])
+    assert np.allclose(location, [4, 4, 0])
+
+    _, _, next_location = Group([action(movement=walk)]).timelines(frame_start=0, location=location)
+    assert np.allclose(next_location, [7, 5, 0])
@@ -0,0 +1,40 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from animationCombiner.core.coordinates import axis_vector, conversion_matrix, convert
+
+AXES = ("X", "Y", "Z", "-X", "-Y", "-Z")
+PAIRS = [(up, forward) for up, forward in product(AXES, AXES) if up[-1] != forward[-1]]
+
+
+@pytest.mark.parametrize("up,forward", PAIRS)
+def test_axes_are_rotation(up, forward):
+    """Every pair of axes is only a rotation, mirror alone changes handedness"""
+    assert np.linalg.det(conversion_matrix(up, forward)) == pytest.approx(1)
+    assert np.linalg.det(conversion_matrix(up, forward, mirror=True)) == pytest.approx(-1)
+
+
+@pytest.mark.parametrize("up,forward", PAIRS)
+def test_axes_map_to_blender(up, forward):
+    matrix = conversion_matrix(up, forward, scale=2.0)
+    assert np.allclose(matrix @ axis_vector(up), [0, 0, 2])
+    assert np.allclose(matrix @ axis_vector(forward), [0, 2, 0])
+
+
+def test_default_is_identity():
+    positions = np.random.default_rng(0).normal(size=(4, 3, 3))
+    assert np.array_equal(conversion_matrix(), np.eye(3))
+    assert convert(positions, conversion_matrix()) is positions
+
+
+def test_swap_of_y_and_z():
+    """Older "Use Y for height" swapped Y and Z, which is Y up, Z forward and mirror"""
+    positions = np.array([[1.0, 2.0, 3.0]])
+    assert np.allclose(convert(positions, conversion_matrix("Y", "Z", mirror=True)), [[1.0, 3.0, 2.0]])
+
+
+def test_same_axes():
+    with pytest.raises(ValueError):
+        conversion_matrix("Y", "-Y")
@@ -0,0 +1,155 @@
+import numpy as np
+import pytest
+
+from animationCombiner.core import bvh, clip
+from animationCombiner.core.kinematics import pose_tails, quaternion_matrices
+from animationCombiner.core.rotation import ROOT_OFFSET, bone_directions, stabilize, swing
+
+# Same hierarchy as HDMSkeleton, which cannot be imported without Blender
+HDM05 = {
+    "root": ["lowerback", "lhipjoint", "rhipjoint"],
+    "lowerback": ["upperback"],
+    "upperback": ["thorax"],
+    "thorax": ["lowerneck", "lclavicle", "rclavicle"],
+    "lowerneck": ["upperneck"],
+    "upperneck": ["head"],
+    "lclavicle": ["lhumerus"],
+    "lhumerus": ["lradius"],
+    "lradius": ["lwrist"],
+    "lwrist": ["lhand", "lthumb"],
+    "lhand": ["lfingers"],
+    "rclavicle": ["rhumerus"],
+    "rhumerus": ["rradius"],
+    "rradius": ["rwrist"],
+    "rwrist": ["rhand", "rthumb"],
+    "rhand": ["rfingers"],
+    "lhipjoint": ["lfemur"],
+    "lfemur": ["ltibia"],
+    "ltibia": ["lfoot"],
+    "lfoot": ["ltoes"],
+    "rhipjoint": ["rfemur"],
+    "rfemur": ["rtibia"],
+    "rtibia": ["rfoot"],
+    "rfoot": ["rtoes"],
+}
+
+BVH = """HIERARCHY
+ROOT Hips
+{
+    OFFSET 0 0 0
+    CHANNELS 6 Xposition Yposition Zposition Zrotation Xrotation Yrotation
+    JOINT Spine
+    {
+        OFFSET 0 10 1
+        CHANNELS 3 Zrotation Xrotation Yrotation
+        JOINT Head
+        {
+            OFFSET 0 12 0
+            CHANNELS 3 Zrotation Xrotation Yrotation
+            End Site
+            {
+                OFFSET 0 5 1
+            }
+        }
+        JOINT LeftArm
+        {
+            OFFSET 4 10 0
+            CHANNELS 3 Yrotation Xrotation Zrotation
+            JOINT LeftForeArm
+            {
+                OFFSET 10 0 0
+                CHANNELS 3 Yrotation Xrotation Zrotation
+                End Site
+                {
+                    OFFSET 9 0 0
+                }
+            }
+        }
+    }
+    JOINT LeftLeg
+    {
+        OFFSET 3 -2 0
+        CHANNELS 3 Xrotation Yrotation Zrotation
+        JOINT LeftKnee
+        {
+            OFFSET 0 -15 0
+            CHANNELS 3 Xrotation Yrotation Zrotation
+            End Site
+            {
+                OFFSET 0 -15 1
+            }
+        }
+    }
+}
+MOTION
+Frames: 4
+Frame Time: 0.033333
+0 90 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0
+1 91 2 10 -20 30 15 5 0 -10 20 0 45 -30 10 0 90 0 -40 5 0 80 0 0
+3 92 1 -170 10 -90 0 0 90 30 -30 60 -80 170 20 0 -120 10 -60 10 -10 120 0 0
+2 90 4 30 179 0 -45 0 0 0 0 0 0 0 0 0 0 0 0 0 90 0 0 0
+"""
+
+
+def hdm05_poses(frames: int) -> tuple:
+    """Positions of HDM05 joints posed by random rotations, bones keep their lengths same as in a real recording"""
+    names = ["root"] + [child for children in HDM05.values() for child in children]
+    index = {name: i for i, name in enumerate(names)}
+    parents = np.full(len(names), -1)
+    for parent, children in HDM05.items():
+        parents[[index[child] for child in children]] = index[parent]
+
+    rng = np.random.default_rng(5)
+    skeleton = bvh.BvhSkeleton(
+        names=names,
+        parents=parents,
+        offsets=rng.uniform(-1, 1, (len(names), 3)) + np.array((0, 2, 0)),
+        channels=[("Xposition", "Yposition", "Zposition", "Zrotation", "Yrotation", "Xrotation")]
+        + [("Zrotation", "Yrotation", "Xrotation")] * (len(names) - 1),
+    )
+    motion = rng.uniform(-180, 180, (frames, 3 + 3 * len(names)))
+    motion[:, :3] = rng.normal(size=(frames, 3)) * 10
+    motion[0, 3:] = 0
+    return bvh.forward_kinematics(skeleton, motion), parents
+
+
+def bvh_poses() -> tuple:
+    skeleton, motion = bvh.read(BVH)
+    return bvh.forward_kinematics(skeleton, motion), skeleton.parents
+
+
+def posed_tails(arrays: dict, parents: np.ndarray) -> np.ndarray:
+    """Tails of an Armature created from the skeleton, same as create_bones, and posed by the rotations"""
+    rest = arrays[clip.SKELETON]
+    directions = bone_directions(rest, parents, rest[np.argmax(parents < 0)] + ROOT_OFFSET)
+    matrices = np.zeros((len(rest), 4, 4))
+    matrices[:, :3, :3] = quaternion_matrices(swing(directions))
+    matrices[:, :3, 3] = rest - directions
+    matrices[:, 3, 3] = 1
+
+    rotations = arrays[clip.ROTATIONS]
+    basis = np.zeros(rotations.shape[:2] + (4, 4))
+    basis[..., :3, :3] = quaternion_matrices(rotations)
+    basis[..., 3, 3] = 1
+    return pose_tails(matrices, np.linalg.norm(directions, axis=-1), parents, basis)
+
+
+@pytest.mark.parametrize("poses", [hdm05_poses(6), bvh_poses()], ids=["hdm05", "bvh"])
+def test_round_trip(poses):
+    """Rotations solved from positions move the bones of the rest pose back into the same positions"""
+    positions, parents = poses
+    arrays = clip.convert(positions, parents)
+    normalized, _ = clip.normalize(positions, np.argmax(parents < 0))
+
+    assert np.allclose(posed_tails(arrays, parents), normalized[1:], atol=1e-6)
+    assert np.allclose(np.linalg.norm(arrays[clip.ROTATIONS], axis=-1), 1)
+
+
+def test_stabilize():
+    rotations = clip.convert(*hdm05_poses(50))[clip.ROTATIONS]
+    flipped = rotations * np.where(np.random.default_rng(1).random(rotations.shape[:2] + (1,)) < 0.5, -1.0, 1.0)
+    stable = stabilize(flipped.copy())
+
+    assert np.all(np.sum(stable[1:] * stable[:-1], axis=-1) >= 0)
+    # Every quaternion is either kept or negated, so it is the same rotation
+    assert np.allclose(np.abs(np.sum(stable * rotations, axis=-1)), 1)